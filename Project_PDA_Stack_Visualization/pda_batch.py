@@ -0,0 +1,109 @@
+"""Check many input strings against one PDA across a pool of worker processes.
+
+Run from this folder, for example:
+
+    python pda_batch.py pda_wcw.json inputs.txt --workers 8
+
+Each line of the input file is one input string. Results stream out in input
+order as tab-separated lines: status, steps, input. The exit code is 0 when
+every input is accepted, 1 when some input is rejected and 3 when some input
+hit --max-steps undecided, as for a single run; 2 means the machine file
+could not be loaded.
+"""
+import argparse
+import multiprocessing
+import sys
+
+from pda_engine import decide, load_pda_json, run
+
+# Exit codes, the same as the run subcommand of pda_stack_visualizer
+EXIT_ACCEPTED = 0
+EXIT_REJECTED = 1
+EXIT_ERROR = 2
+EXIT_UNDECIDED = 3
+
+# Set in each worker process by _init_worker
+_worker_pda = None
+_worker_max_steps = None
+_worker_decide = False
+
+
+def _init_worker(pda, max_steps, use_decide=False):
+    """Receive the compiled PDA once per worker instead of once per input"""
+    global _worker_pda, _worker_max_steps, _worker_decide
+    _worker_pda = pda
+    _worker_max_steps = max_steps
+    _worker_decide = use_decide
+
+
+def _check_one(pda, input_string, max_steps, use_decide):
+    if use_decide:
+        result = decide(pda, input_string)
+        return input_string, result.status, result.summaries
+    result = run(pda, input_string, max_steps)
+    return input_string, result.status, result.steps
+
+
+def _check(input_string):
+    return _check_one(_worker_pda, input_string, _worker_max_steps, _worker_decide)
+
+
+def check_inputs(pda, inputs, workers=None, max_steps=None, chunksize=256, use_decide=False):
+    """Yield (input, status, steps) for each input, in order, as results arrive.
+
+    Inputs are spread over a process pool with workers processes (default:
+    one per core). The PDA is compiled here and shipped to every worker once,
+    and inputs travel in chunks of chunksize to keep messaging cheap. With
+    workers=1 everything runs in this process. With use_decide each input
+    is answered by decide() and steps is the number of summaries it built.
+    """
+    pda.compile()
+    if workers == 1:
+        for input_string in inputs:
+            yield _check_one(pda, input_string, max_steps, use_decide)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(pda, max_steps, use_decide)) as pool:
+        for item in pool.imap(_check, inputs, chunksize):
+            yield item
+
+
+def read_inputs(file_path):
+    """Yield input strings from a file, one per line"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            yield line.rstrip('\r\n')
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Check a file of input strings against a PDA")
+    parser.add_argument("machine", help="PDA JSON file")
+    parser.add_argument("inputs", help="file with one input string per line")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--max-steps", type=int, default=None, help="give up on an input after this many steps")
+    parser.add_argument("--chunksize", type=int, default=256, help="inputs sent to a worker at a time")
+    parser.add_argument("--decide", action="store_true",
+                        help="answer each input in polynomial time from stack summaries (ignores --max-steps)")
+    args = parser.parse_args(argv)
+
+    try:
+        pda = load_pda_json(args.machine)
+    except (OSError, ValueError) as e:
+        print(f"Error loading {args.machine}: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    accepted = undecided = total = 0
+    for input_string, status, steps in check_inputs(pda, read_inputs(args.inputs), args.workers,
+                                                    args.max_steps, args.chunksize, args.decide):
+        total += 1
+        accepted += status == "accepted"
+        undecided += status == "undecided"
+        print(f"{status}\t{steps}\t{input_string}")
+    print(f"{accepted}/{total} accepted", file=sys.stderr)
+
+    if undecided:
+        return EXIT_UNDECIDED
+    return EXIT_ACCEPTED if accepted == total else EXIT_REJECTED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Benchmarks for the headless PDA engine.
+
+Run from this folder, for example:
+
+    python pda_bench.py memory --machine pda_balanced_parentheses.json --size 20000
+    python pda_bench.py suite --save          # record bench_baseline.json
+    python pda_bench.py suite                 # compare against it
+
+The suite runs every bundled machine on generated inputs it accepts and
+inputs it rejects, at lengths from 10 up to 10^6, and records wall time,
+peak traced memory and configurations explored for each. Saved as a
+baseline, a later run flags any case that got slower or bigger beyond the
+tolerance, explored more configurations, or changed its answer.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from pda_engine import ConfigurationTable, Simulation, load_pda_json, run
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "bench_baseline.json")
+SUITE_SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+
+
+def _repeat(pattern, size):
+    return (pattern * (size // len(pattern) + 1))[:size]
+
+
+def _wcw(size):
+    w = _repeat("ab", max(1, (size - 1) // 2))
+    accept = w + "c" + w[::-1]
+    return accept, accept[:-1] + ("b" if accept.endswith("a") else "a")
+
+
+def _three_blocks(first, middle, last):
+    def inputs(size):
+        n = max(1, size // 3)
+        accept = first * n + middle * n + last * n
+        return accept, accept + last
+    return inputs
+
+
+def _two_blocks(first, last):
+    def inputs(size):
+        n = max(1, size // 2)
+        return first * n + last * n, first * n + last * (n - 1)
+    return inputs
+
+
+def _multiple_bs(size):
+    n = max(1, size // 3)
+    return "abb" * n, "abb" * n + "a"
+
+
+def _even_as(size):
+    accept = _repeat("ab", size)
+    if accept.count("a") % 2:
+        accept = "b" + accept[1:]
+    # Changing the first symbol makes the count of a's odd
+    return accept, ("b" if accept[0] == "a" else "a") + accept[1:]
+
+
+def _specific_palindrome(size):
+    # The language is the single string "abba", so only rejections scale
+    return ("abba" if size <= 10 else None), _repeat("abba", size - 1) + "a"
+
+
+# Machine file -> function of a length returning (accepted input, rejected input);
+# None for an input means the machine has none of about that length
+SUITE_INPUTS = {
+    "pda_0n1n2n_fixed.json": _three_blocks("0", "1", "2"),
+    "pda_anbmc.json": _three_blocks("a", "b", "c"),
+    "pda_balanced_parentheses.json": _two_blocks("(", ")"),
+    "pda_deterministic.json": _two_blocks("a", "b"),
+    "pda_even_as.json": _even_as,
+    "pda_multiple_bs.json": _multiple_bs,
+    "pda_specific_palindrome.json": _specific_palindrome,
+    "pda_wcw.json": _wcw,
+}
+
+
+class _DictConfiguration:
+    """The configuration layout used before __slots__: one __dict__ per object"""
+
+    def __init__(self, state, input_buffer, position, stack, parent=None, transition_taken=None):
+        self.state = state
+        self.input_buffer = input_buffer
+        self.position = position
+        self.stack = stack
+        self.parent = parent
+        self.transition_taken = transition_taken
+
+
+def _measure(pda, input_string, layout):
+    """Return (bytes retained by the trace store, rows recorded) for one layout"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    simulation = Simulation(pda, input_string)
+    if layout == "table":
+        store = ConfigurationTable(input_string)
+        store.extend(simulation.configs)
+    else:
+        store = []
+        copies = {}
+        seen = set()
+
+    while simulation.configs and not simulation.is_finished():
+        if layout == "table":
+            simulation.step()
+            store.extend(simulation.configs)
+        elif layout == "slots":
+            for config in simulation.configs:
+                if id(config) not in seen:
+                    seen.add(id(config))
+                    store.append(config)
+            simulation.step()
+        else:
+            # Copies keep their parents alive through the previous batch's copies
+            previous = copies
+            copies = {}
+            for config in simulation.configs:
+                parent = previous.get(id(config.parent)) if config.parent is not None else None
+                copy = _DictConfiguration(config.state, config.input_buffer, config.position,
+                                          config.stack, parent, config.transition_taken)
+                copies[id(config)] = copy
+                store.append(copy)
+            simulation.step()
+
+    rows = len(store)
+    if layout == "table":
+        store.detach()
+    del simulation
+    seen = copies = None
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del store
+    return retained, rows
+
+
+def memory_benchmark(machine, input_string):
+    """Compare trace-history memory for the three configuration layouts"""
+    pda = load_pda_json(machine)
+    results = []
+    for layout in ("dict", "slots", "table"):
+        retained, rows = _measure(pda, input_string, layout)
+        results.append((layout, retained, rows))
+    return results
+
+
+def _measure_case(pda, input_string, memory, repeat=5):
+    """Return (result, seconds, peak traced bytes or None) for one input.
+
+    Short runs are repeated up to repeat times and the best time kept, since
+    a single run of a millisecond or two is mostly noise.
+    """
+    seconds = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = run(pda, input_string)
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+        if elapsed > 0.1:
+            break
+    peak = None
+    if memory:
+        # A second run under tracemalloc, which would distort the timing above
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = run(pda, input_string)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def suite_benchmark(machines=None, sizes=SUITE_SIZES, memory=True, time_limit=60.0, report=None):
+    """Run the suite and return one row dict per (machine, case, size).
+
+    machines lists file names from SUITE_INPUTS (default: all of them).
+    Once a case takes longer than time_limit seconds its larger sizes are
+    skipped. report, if given, is called with each row as it is measured.
+    """
+    rows = []
+    for machine in machines or sorted(SUITE_INPUTS):
+        pda = load_pda_json(os.path.join(HERE, machine))
+        pda.compile()
+        too_slow = set()
+        for size in sizes:
+            accept, reject = SUITE_INPUTS[machine](size)
+            for case, input_string, expected in (("accept", accept, True), ("reject", reject, False)):
+                if input_string is None or case in too_slow:
+                    continue
+                result, seconds, peak = _measure_case(pda, input_string, memory)
+                row = {
+                    "machine": machine,
+                    "case": case,
+                    "size": size,
+                    "length": len(input_string),
+                    "status": result.status,
+                    "correct": result.accepted == expected,
+                    "seconds": seconds,
+                    "peak_bytes": peak,
+                    "explored": result.explored,
+                }
+                del result
+                rows.append(row)
+                if report is not None:
+                    report(row)
+                if seconds > time_limit:
+                    too_slow.add(case)
+    return rows
+
+
+def save_baseline(rows, file_path):
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump({"python": platform.python_version(), "rows": rows}, file, indent=1)
+
+
+def load_baseline(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return json.load(file)["rows"]
+
+
+def compare_to_baseline(rows, baseline, tolerance=0.25, noise_seconds=0.01):
+    """Return (row, reason) for every row that regressed against the baseline.
+
+    Time and memory regress when they grow by more than tolerance (a
+    fraction); times below noise_seconds in both runs are ignored. Any
+    growth in configurations explored, or a changed answer, is flagged.
+    """
+    before = {(row["machine"], row["case"], row["size"]): row for row in baseline}
+    regressions = []
+    for row in rows:
+        old = before.get((row["machine"], row["case"], row["size"]))
+        if old is None:
+            continue
+        if row["status"] != old["status"]:
+            regressions.append((row, f"answer changed from {old['status']} to {row['status']}"))
+        if row["explored"] is not None and old["explored"] is not None and row["explored"] > old["explored"]:
+            regressions.append((row, f"explored {row['explored']} configurations, was {old['explored']}"))
+        if (row["seconds"] > old["seconds"] * (1 + tolerance)
+                and max(row["seconds"], old["seconds"]) >= noise_seconds):
+            regressions.append((row, f"{row['seconds']:.4f}s, was {old['seconds']:.4f}s"))
+        if (row["peak_bytes"] is not None and old["peak_bytes"] is not None
+                and row["peak_bytes"] > old["peak_bytes"] * (1 + tolerance)):
+            regressions.append((row, f"peak {row['peak_bytes']} bytes, was {old['peak_bytes']}"))
+    return regressions
+
+
+def _print_row(row):
+    peak = "-" if row["peak_bytes"] is None else row["peak_bytes"]
+    flag = "" if row["correct"] else "  WRONG ANSWER"
+    print(f"{row['machine']:<30} {row['case']:<6} {row['length']:>8} {row['status']:<9} "
+          f"{row['seconds']:>10.4f} {peak:>12} {row['explored']:>9}{flag}", flush=True)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmarks for the PDA engine")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    memory = subparsers.add_parser("memory", help="compare configuration storage layouts")
+    memory.add_argument("--machine", default=os.path.join(HERE, "pda_balanced_parentheses.json"))
+    memory.add_argument("--input", help="input string (default: nested parentheses of --size)")
+    memory.add_argument("--size", type=int, default=10000)
+
+    suite = subparsers.add_parser("suite", help="time every bundled machine on scaled inputs")
+    suite.add_argument("--machine", action="append", choices=sorted(SUITE_INPUTS),
+                       help="machine file to include (repeatable; default: all)")
+    suite.add_argument("--sizes", type=int, nargs="+", default=list(SUITE_SIZES), help="input lengths")
+    suite.add_argument("--max-size", type=int, default=None, help="drop sizes above this")
+    suite.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run of each case")
+    suite.add_argument("--time-limit", type=float, default=60.0,
+                       help="skip larger sizes of a case once one takes longer than this many seconds")
+    suite.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to compare with or save")
+    suite.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    suite.add_argument("--tolerance", type=float, default=0.25,
+                       help="allowed growth in time and memory as a fraction, e.g. 0.25 for 25%%")
+
+    args = parser.parse_args(argv)
+
+    if args.benchmark == "memory":
+        input_string = args.input if args.input is not None else "(" * args.size + ")" * args.size
+        print(f"{'layout':<8} {'rows':>10} {'bytes':>14} {'bytes/row':>10}")
+        for layout, retained, rows in memory_benchmark(args.machine, input_string):
+            print(f"{layout:<8} {rows:>10} {retained:>14} {retained / max(rows, 1):>10.1f}")
+
+    elif args.benchmark == "suite":
+        sizes = [size for size in args.sizes if args.max_size is None or size <= args.max_size]
+        print(f"{'machine':<30} {'case':<6} {'length':>8} {'status':<9} {'seconds':>10} {'peak bytes':>12} {'explored':>9}")
+        rows = suite_benchmark(args.machine, sizes, not args.no_memory, args.time_limit, _print_row)
+        wrong = sum(1 for row in rows if not row["correct"])
+
+        if args.save:
+            save_baseline(rows, args.baseline)
+            print(f"Baseline saved to {args.baseline}")
+            return 1 if wrong else 0
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save to record one")
+            return 1 if wrong else 0
+
+        regressions = compare_to_baseline(rows, load_baseline(args.baseline), args.tolerance)
+        for row, reason in regressions:
+            print(f"REGRESSION {row['machine']} {row['case']} length {row['length']}: {reason}")
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        return 1 if regressions or wrong else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Remember acceptance answers between runs.
+
+RunCache keys every answer by the machine's fingerprint and a digest of the
+input, so loading the same machine file again, or resetting and running the
+same input, is answered without simulating anything. Answers live in a
+least-recently-used table and can be saved to a JSON file between sessions.
+
+Inputs that share a long prefix share work too: while an input is checked,
+the StreamRecognizer frontier is saved every checkpoint_interval symbols,
+and a later input starting with the same symbols resumes from the furthest
+saved frontier. Those frontiers hold live stacks, so they are kept in memory
+only and never written to the file. Machines with a growing epsilon cycle
+cannot be streamed; their answers are worked out by decide() instead, with
+no prefix sharing.
+
+Run from this folder, for example:
+
+    python pda_cache.py pda_wcw.json inputs.txt --cache answers.json
+
+The exit code is 0 when every input is accepted, 1 otherwise, and 2 when the
+machine or cache file cannot be loaded.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+
+from pda_engine import STREAM_ACCEPTED, STREAM_DEAD, StreamRecognizer, decide, load_pda_json
+
+# Exit codes, the same as the run subcommand of pda_stack_visualizer
+EXIT_ACCEPTED = 0
+EXIT_REJECTED = 1
+EXIT_ERROR = 2
+
+# Layout version of the file written by RunCache.save(); 2 tags digests with the input type
+CACHE_FILE_VERSION = 2
+
+
+def _encode(symbols):
+    return symbols.encode('utf-8') if isinstance(symbols, str) else bytes(symbols)
+
+
+def _new_digest(input_string):
+    """A hash started with the input's type, since a str is read per character and bytes per byte"""
+    return hashlib.sha256(b"str:" if isinstance(input_string, str) else b"bytes:")
+
+
+def input_digest(input_string):
+    """Hex digest identifying an input string, or bytes, in cache keys"""
+    digest = _new_digest(input_string)
+    digest.update(_encode(input_string))
+    return digest.hexdigest()
+
+
+class RunCache:
+    """Acceptance answers keyed by (machine fingerprint, input digest).
+
+    capacity bounds the answers kept and checkpoint_capacity the saved
+    prefix frontiers; the least recently used go first. With a path the
+    answers are loaded from it now and written back by save().
+    """
+
+    def __init__(self, capacity=4096, path=None, checkpoint_interval=1024, checkpoint_capacity=256):
+        self.capacity = capacity
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_capacity = checkpoint_capacity
+        self.results = OrderedDict()      # (fingerprint, input digest) -> accepted
+        self.checkpoints = OrderedDict()  # (fingerprint, offset, prefix digest) -> StreamRecognizer
+        self.hits = 0      # Answers found in the table
+        self.misses = 0    # Answers that had to be worked out
+        self.resumed = 0   # Misses that started from a saved prefix frontier
+        self._fingerprint = (None, None)  # Last compiled machine seen and its fingerprint
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.results)
+
+    def fingerprint(self, pda):
+        """pda.fingerprint(), remembered while the machine's transitions are unchanged"""
+        compiled = pda.compile()
+        if self._fingerprint[0] is not compiled:
+            self._fingerprint = (compiled, pda.fingerprint())
+        return self._fingerprint[1]
+
+    def lookup(self, pda, input_string):
+        """Return the cached answer for input_string, or None if there is none"""
+        key = (self.fingerprint(pda), input_digest(input_string))
+        accepted = self.results.get(key)
+        if accepted is not None:
+            self.results.move_to_end(key)
+        return accepted
+
+    def store(self, pda, input_string, accepted):
+        """Record whether pda accepts input_string, found by any means"""
+        self._remember((self.fingerprint(pda), input_digest(input_string)), accepted)
+
+    def _remember(self, key, accepted):
+        self.results[key] = bool(accepted)
+        self.results.move_to_end(key)
+        while len(self.results) > self.capacity:
+            self.results.popitem(last=False)
+
+    def accepts(self, pda, input_string):
+        """Whether pda accepts input_string, from the table if possible"""
+        fingerprint = self.fingerprint(pda)
+        key = (fingerprint, input_digest(input_string))
+        accepted = self.results.get(key)
+        if accepted is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return accepted
+
+        self.misses += 1
+        if pda.growing_epsilon_cycle:
+            # StreamRecognizer refuses these; decide() stays polynomial
+            accepted = decide(pda, input_string).accepted
+        else:
+            accepted = self._recognize(pda, fingerprint, input_string)
+        self._remember(key, accepted)
+        return accepted
+
+    def _recognize(self, pda, fingerprint, input_string):
+        interval = self.checkpoint_interval
+        # Keys of every checkpoint offset along this input, found with one pass of hashing
+        digest = _new_digest(input_string)
+        offsets = []
+        for offset in range(interval, len(input_string) + 1, interval):
+            digest.update(_encode(input_string[offset - interval:offset]))
+            offsets.append((offset, (fingerprint, offset, digest.hexdigest())))
+
+        recognizer, start = None, 0
+        for offset, key in reversed(offsets):
+            if key in self.checkpoints:
+                self.checkpoints.move_to_end(key)
+                recognizer, start = self.checkpoints[key].copy(), offset
+                self.resumed += 1
+                break
+        if recognizer is None:
+            recognizer = StreamRecognizer(pda)
+
+        for offset, key in offsets:
+            if offset <= start:
+                continue
+            if recognizer.feed(input_string[offset - interval:offset]) == STREAM_DEAD:
+                return False
+            self._save_checkpoint(key, recognizer)
+        return recognizer.feed(input_string[len(offsets) * interval:]) == STREAM_ACCEPTED
+
+    def _save_checkpoint(self, key, recognizer):
+        self.checkpoints[key] = recognizer.copy()
+        while len(self.checkpoints) > self.checkpoint_capacity:
+            self.checkpoints.popitem(last=False)
+
+    def clear(self):
+        self.results.clear()
+        self.checkpoints.clear()
+        self.hits = self.misses = self.resumed = 0
+
+    def load(self, path):
+        """Add the answers saved in a file by save()"""
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get("version") != CACHE_FILE_VERSION:
+            raise ValueError(f"{path}: unsupported cache file version {data.get('version')!r}")
+        for fingerprint, digest, accepted in data["results"]:
+            self._remember((fingerprint, digest), accepted)
+
+    def save(self, path=None):
+        """Write the answers, least recently used first, to path or the cache's own file"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No cache file to save to")
+        results = [[fingerprint, digest, accepted] for (fingerprint, digest), accepted in self.results.items()]
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({"version": CACHE_FILE_VERSION, "results": results}, file)
+
+
+def read_inputs(file_path):
+    """Yield input strings from a file, one per line"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            yield line.rstrip('\r\n')
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Check input strings against a PDA, reusing past answers")
+    parser.add_argument("machine", help="PDA JSON file")
+    parser.add_argument("inputs", help="file with one input string per line")
+    parser.add_argument("--cache", help="JSON file to load answers from and save them to")
+    parser.add_argument("--capacity", type=int, default=4096, help="answers kept, least recently used dropped first")
+    parser.add_argument("--checkpoint-interval", type=int, default=1024,
+                        help="input symbols between saved prefix frontiers")
+    args = parser.parse_args(argv)
+
+    try:
+        pda = load_pda_json(args.machine)
+    except (OSError, ValueError) as e:
+        print(f"Error loading {args.machine}: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    try:
+        cache = RunCache(args.capacity, args.cache, args.checkpoint_interval)
+    except (OSError, ValueError) as e:
+        print(f"Error loading {args.cache}: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    accepted = total = 0
+    for input_string in read_inputs(args.inputs):
+        total += 1
+        answer = cache.accepts(pda, input_string)
+        accepted += answer
+        print(f"{'accepted' if answer else 'rejected'}\t{input_string}")
+    if args.cache:
+        cache.save()
+    print(f"{accepted}/{total} accepted, {cache.hits} cached, {cache.resumed} resumed from a prefix",
+          file=sys.stderr)
+    return EXIT_ACCEPTED if accepted == total else EXIT_REJECTED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1614 @@
+"""Headless simulation engine for pushdown automata.
+
+This module holds the PDA model and the nondeterministic search that the
+visualizer drives. It imports no GUI code, so acceptance checks can run on
+machines without a display.
+"""
+import hashlib
+import heapq
+import json
+import mmap
+import os
+from array import array
+from collections import deque
+
+# Define a constant for epsilon to ensure consistency
+EPSILON = 'ε'
+
+# Spellings of epsilon found in hand-written and mis-encoded machine files
+EPSILON_ALIASES = ('ε', 'Îµ', 'Ïµ', 'ϵ', '')
+
+# What shortest_witness() minimises: every transition, or epsilon transitions only
+SEARCH_METRICS = ("moves", "epsilon")
+
+
+def normalize_epsilon(symbol):
+    """Map any spelling of epsilon to EPSILON"""
+    return EPSILON if symbol in EPSILON_ALIASES else symbol
+
+
+def tokenize_push(stack_push, stack_symbols):
+    """Split a push into stack symbol names, top first, as a tuple.
+
+    stack_push may be a list of names, the explicit form in JSON files, or
+    a string. A string with whitespace is split on it; a string that is a
+    known symbol is that one symbol; any other string is split into the
+    longest known symbols from the left, with unknown characters as
+    one-character symbols, which is how single-character machines have
+    always been written. Epsilon is the empty tuple.
+    """
+    if not isinstance(stack_push, str):
+        return tuple(symbol for symbol in stack_push if normalize_epsilon(symbol) != EPSILON)
+    text = stack_push.strip()
+    if normalize_epsilon(text) == EPSILON:
+        return ()
+    if len(text.split()) > 1:
+        return tuple(text.split())
+    if text in stack_symbols:
+        return (text,)
+
+    longest = max((len(symbol) for symbol in stack_symbols), default=1)
+    symbols = []
+    i = 0
+    while i < len(text):
+        for size in range(min(longest, len(text) - i), 0, -1):
+            if text[i:i + size] in stack_symbols:
+                break
+        else:
+            size = 1
+        symbols.append(text[i:i + size])
+        i += size
+    return tuple(symbols)
+
+
+class PDA:
+    def __init__(self):
+        self.states = set()
+        self.alphabet = set()
+        self.stack_symbols = set()
+        self.transitions = {}
+        self.initial_state = None
+        self.initial_stack_symbol = None
+        self.accept_states = set()
+
+        # Filled in by analyse_epsilon(); None means the tables are stale
+        self.epsilon_moves = None
+        self.epsilon_closure = None
+        self.epsilon_cycles = None
+        self.growing_epsilon_cycle = False
+
+        # Filled in by analyse_liveness(); None means the sets are stale
+        self.reachable_states = None
+        self.live_states = None
+        self.readable_tops = None
+
+        # Cached by compile()
+        self.compiled = None
+
+    def add_transition(self, state, input_symbol, stack_symbol, next_state, stack_push):
+        """Add a transition to the PDA.
+
+        stack_push is a sequence of stack symbol names, top first, or a
+        string split by tokenize_push(); it is stored as a tuple.
+        """
+        # Normalize epsilon
+        input_symbol = normalize_epsilon(input_symbol)
+        stack_push = tokenize_push(stack_push, self.stack_symbols)
+
+        key = (state, input_symbol, stack_symbol)
+        if key not in self.transitions:
+            self.transitions[key] = []
+        self.transitions[key].append((next_state, stack_push))
+        self.epsilon_moves = None
+        self.live_states = None
+        self.compiled = None
+
+    def push_text(self, stack_push):
+        """Format a push tuple for display, the inverse of tokenize_push()"""
+        if not stack_push:
+            return EPSILON
+        if all(len(symbol) == 1 for symbol in self.stack_symbols) and all(len(symbol) == 1 for symbol in stack_push):
+            return "".join(stack_push)
+        return " ".join(stack_push)
+
+    def transition_text(self, state, input_symbol, stack_symbol, next_state, stack_push):
+        """Format a transition as traces show it, for example q0, a, Z → q0, AZ"""
+        return f"{state}, {input_symbol}, {stack_symbol} → {next_state}, {self.push_text(stack_push)}"
+
+    def fingerprint(self):
+        """Return a content hash of everything that decides what the PDA accepts.
+
+        Covers the transitions, the initial state and stack symbol and the
+        accept states, in a canonical order, so the same machine loaded
+        twice, or written out in a different order, gets the same value.
+        """
+        transitions = sorted(
+            (state, input_symbol, stack_symbol, next_state, list(stack_push))
+            for (state, input_symbol, stack_symbol), moves in self.transitions.items()
+            for next_state, stack_push in moves
+        )
+        content = [self.initial_state, self.initial_stack_symbol, sorted(self.accept_states), transitions]
+        return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def compile(self):
+        """Return the integer transition table for this PDA, building it if needed"""
+        if self.compiled is None:
+            if self.epsilon_moves is None:
+                self.analyse_epsilon()
+            if self.live_states is None:
+                self.analyse_liveness()
+            self.compiled = CompiledPDA(self)
+        return self.compiled
+
+    def analyse_epsilon(self):
+        """Precompute epsilon-move tables and find epsilon cycles.
+
+        epsilon_moves maps (state, top) to the epsilon transitions reading
+        that top, with their trace text already formatted. epsilon_closure
+        maps (state, top) to every (state, top) reachable through epsilon
+        moves that only rewrite the top symbol, so a cycle of such moves is
+        folded into a single lookup. epsilon_cycles lists each cycle of the
+        epsilon graph as (members, growing); a growing cycle can push without
+        consuming input, and stack_bound() then limits the search. Loops made
+        only of pops shrink the stack every time round and are not listed.
+        """
+        symbols = set(self.stack_symbols)
+        for (_, _, stack_symbol), moves in self.transitions.items():
+            symbols.add(stack_symbol)
+            for _, stack_push in moves:
+                symbols.update(stack_push)
+
+        self.epsilon_moves = {}
+        rewrites = {}  # Top-rewriting moves only: (state, top) -> [(state, top, info)]
+        edges = {}     # (state, top) -> [((state, top), stack growth)]
+        for (state, input_symbol, stack_symbol), moves in self.transitions.items():
+            if input_symbol != EPSILON:
+                continue
+            node = (state, stack_symbol)
+            for next_state, stack_push in moves:
+                info = self.transition_text(state, EPSILON, stack_symbol, next_state, stack_push)
+                self.epsilon_moves.setdefault(node, []).append((next_state, stack_push, info))
+                if not stack_push:
+                    # A pop exposes a symbol we cannot know statically
+                    for symbol in symbols:
+                        edges.setdefault(node, []).append(((next_state, symbol), -1))
+                else:
+                    edges.setdefault(node, []).append(((next_state, stack_push[0]), len(stack_push) - 1))
+                    if len(stack_push) == 1:
+                        rewrites.setdefault(node, []).append((next_state, stack_push[0], info))
+
+        # Breadth-first closure over top-rewriting moves, keeping the first chain found
+        self.epsilon_closure = {}
+        for node in rewrites:
+            chains = {node: None}
+            reached = []
+            queue = deque([(node, [])])
+            while queue:
+                current, chain = queue.popleft()
+                for next_state, top, info in rewrites.get(current, []):
+                    target = (next_state, top)
+                    if target in chains:
+                        continue
+                    chains[target] = chain + [info]
+                    reached.append((next_state, top, "; ".join(chains[target])))
+                    queue.append((target, chains[target]))
+            self.epsilon_closure[node] = reached
+
+        self.epsilon_cycles = []
+        self.growing_epsilon_cycle = False
+        for component in _strongly_connected(edges):
+            members = set(component)
+            internal = [
+                growth
+                for node in component
+                for target, growth in edges.get(node, [])
+                if target in members
+            ]
+            if len(component) == 1 and not internal:
+                continue
+            if all(growth < 0 for growth in internal):
+                # Every move inside pops, so the stack drains and the loop cannot repeat forever
+                continue
+            growing = any(growth > 0 for growth in internal)
+            self.growing_epsilon_cycle = self.growing_epsilon_cycle or growing
+            self.epsilon_cycles.append((sorted(component), growing))
+
+    def analyse_liveness(self):
+        """Find the states and stack tops that can still lead to acceptance.
+
+        reachable_states can be entered from the initial state and
+        live_states can reach an accept state, both following transitions
+        while ignoring the stack. readable_tops maps each state to the stack
+        symbols some transition out of it reads. A configuration in a state
+        that is not live, or whose top its state cannot read, has no
+        accepting future unless it accepts already.
+        """
+        successors = {}
+        predecessors = {}
+        self.readable_tops = {state: set() for state in self.states | {self.initial_state}}
+        for (state, _, stack_symbol), moves in self.transitions.items():
+            self.readable_tops.setdefault(state, set()).add(stack_symbol)
+            for next_state, _ in moves:
+                successors.setdefault(state, set()).add(next_state)
+                predecessors.setdefault(next_state, set()).add(state)
+
+        def closure(start, edges):
+            seen = set(start)
+            queue = deque(seen)
+            while queue:
+                for neighbour in edges.get(queue.popleft(), ()):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        queue.append(neighbour)
+            return seen
+
+        self.reachable_states = closure({self.initial_state} if self.initial_state else set(), successors)
+        self.live_states = closure(self.accept_states, predecessors)
+
+    def stack_bound(self, input_length):
+        """Return the tallest stack worth exploring on an input, or None if unbounded is safe.
+
+        Only machines with a growing epsilon cycle need a bound. A minimal
+        accepting run never repeats a (state, top, state) summary without
+        reading input in between, so its stack stays below
+        (n + 1) * |Q|^2 * |Gamma| * (longest push).
+        """
+        if self.epsilon_moves is None:
+            self.analyse_epsilon()
+        if not self.growing_epsilon_cycle:
+            return None
+
+        symbols = set(self.stack_symbols)
+        longest_push = 1
+        for (_, _, stack_symbol), moves in self.transitions.items():
+            symbols.add(stack_symbol)
+            for _, stack_push in moves:
+                longest_push = max(longest_push, len(stack_push))
+        return (input_length + 1) * len(self.states) ** 2 * len(symbols) * longest_push
+
+
+class CompiledPDA:
+    """Integer transition table built by PDA.compile().
+
+    States, input symbols and stack symbols are numbered from 0 in sorted
+    order. table is a flat tuple indexed by index(state, input, top), where
+    the input number epsilon_input stands for "no input symbol". Each entry
+    holds the moves that read that input symbol followed by the epsilon
+    moves, with chains of top-rewriting epsilon moves already folded in, so
+    a configuration finds all of its moves with one index. A move is
+    (next_state, consumes_input, push, transition_info) where push lists
+    the symbols to push bottom-first.
+    """
+
+    def __init__(self, pda):
+        symbols = set(pda.stack_symbols)
+        for (_, _, stack_symbol), moves in pda.transitions.items():
+            symbols.add(stack_symbol)
+            for _, stack_push in moves:
+                symbols.update(stack_push)
+        inputs = {symbol for (_, symbol, _) in pda.transitions if symbol != EPSILON}
+        inputs.update(symbol for symbol in pda.alphabet if symbol != EPSILON)
+
+        self.state_names = sorted(pda.states | {pda.initial_state})
+        self.input_names = sorted(inputs)
+        self.symbol_names = sorted(symbols)
+        self.state_ids = {name: i for i, name in enumerate(self.state_names)}
+        self.input_ids = {name: i for i, name in enumerate(self.input_names)}
+        self.symbol_ids = {name: i for i, name in enumerate(self.symbol_names)}
+        # Stacks print as "AAZ", or "A1 A1 Z0" once a symbol is longer than a character
+        self.symbol_separator = "" if all(len(name) == 1 for name in self.symbol_names) else " "
+
+        self.epsilon_input = len(self.input_names)
+        self.accepting = tuple(name in pda.accept_states for name in self.state_names)
+        # From analyse_liveness(): live per state, readable per (state, top)
+        self.live = tuple(name in pda.live_states for name in self.state_names)
+        self.readable = bytes(
+            top in pda.readable_tops.get(state, ())
+            for state in self.state_names
+            for top in self.symbol_names
+        )
+        self.initial_state = self.state_ids[pda.initial_state]
+        self.initial_stack = (self.symbol_ids[pda.initial_stack_symbol],)
+        # Input numbers for bytes and memoryview input, one per byte value
+        self.byte_input_ids = tuple(self.input_ids.get(chr(i), self.epsilon_input) for i in range(256))
+
+        def move(next_state, consumes, stack_push, info):
+            push = tuple(self.symbol_ids[symbol] for symbol in reversed(stack_push))
+            return (self.state_ids[next_state], consumes, push, info)
+
+        # Epsilon moves that pop or grow, then the folded rewrite chains
+        epsilon_entries = {}
+        for (state, top), moves in pda.epsilon_moves.items():
+            epsilon_entries[(state, top)] = [
+                move(next_state, False, stack_push, info)
+                for next_state, stack_push, info in moves
+                if len(stack_push) != 1
+            ]
+        for (state, top), reached in pda.epsilon_closure.items():
+            epsilon_entries.setdefault((state, top), []).extend(
+                move(next_state, False, (new_top,), info) for next_state, new_top, info in reached
+            )
+
+        table = [()] * (len(self.state_names) * (self.epsilon_input + 1) * len(self.symbol_names))
+        for (state, top), entries in epsilon_entries.items():
+            if entries:
+                table[self.index(self.state_ids[state], self.epsilon_input, self.symbol_ids[top])] = tuple(entries)
+        for (state, input_symbol, top), moves in pda.transitions.items():
+            if input_symbol == EPSILON:
+                continue
+            entries = [
+                move(next_state, True, stack_push, pda.transition_text(state, input_symbol, top, next_state, stack_push))
+                for next_state, stack_push in moves
+            ]
+            entries.extend(epsilon_entries.get((state, top), []))
+            table[self.index(self.state_ids[state], self.input_ids[input_symbol], self.symbol_ids[top])] = tuple(entries)
+
+        # Input symbols without their own moves still take the epsilon moves
+        for state in range(len(self.state_names)):
+            for top in range(len(self.symbol_names)):
+                epsilon_moves = table[self.index(state, self.epsilon_input, top)]
+                if not epsilon_moves:
+                    continue
+                for input_id in range(self.epsilon_input):
+                    slot = self.index(state, input_id, top)
+                    if not table[slot]:
+                        table[slot] = epsilon_moves
+        self.table = tuple(table)
+
+        self.deterministic_table = self._deterministic_table(pda)
+        self.deterministic = self.deterministic_table is not None
+
+    def _deterministic_table(self, pda):
+        """Build a one-move-per-slot table, or return None if the PDA is not deterministic.
+
+        A PDA is deterministic when every (state, input, top) has at most one
+        move, and a (state, top) with an epsilon move has no input moves that
+        could compete with it. Machines with epsilon cycles that need not
+        shrink the stack are left to the general search, which is the one
+        that guards against them; loops that only pop, such as one draining
+        the stack at the end of the input, are not cycles there and stay
+        on the fast path.
+        """
+        if pda.epsilon_cycles:
+            return None
+
+        def move(next_state, consumes, stack_push, info):
+            push = tuple(self.symbol_ids[symbol] for symbol in reversed(stack_push))
+            return (self.state_ids[next_state], consumes, push, info)
+
+        table = [None] * len(self.table)
+        for (state, input_symbol, top), moves in pda.transitions.items():
+            if len(moves) > 1:
+                return None
+            next_state, stack_push = moves[0]
+            consumes = input_symbol != EPSILON
+            if consumes and (state, EPSILON, top) in pda.transitions:
+                return None
+            info = pda.transition_text(state, input_symbol, top, next_state, stack_push)
+            entry = move(next_state, consumes, stack_push, info)
+            state_id = self.state_ids[state]
+            top_id = self.symbol_ids[top]
+            if consumes:
+                table[self.index(state_id, self.input_ids[input_symbol], top_id)] = entry
+            else:
+                # An epsilon move applies whatever the next input symbol is
+                for input_id in range(self.epsilon_input + 1):
+                    table[self.index(state_id, input_id, top_id)] = entry
+        return tuple(table)
+
+    def index(self, state, input_id, top):
+        """Position in table of the moves for (state, input, top)"""
+        return (state * (self.epsilon_input + 1) + input_id) * len(self.symbol_names) + top
+
+
+def _strongly_connected(edges):
+    """Tarjan's algorithm, iterative; yields each strongly connected component"""
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    counter = 0
+    nodes = set(edges)
+    for targets in edges.values():
+        nodes.update(target for target, _ in targets)
+
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(edges.get(root, [])))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, targets = work[-1]
+            advanced = False
+            for target, _ in targets:
+                if target not in index:
+                    index[target] = lowlink[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(edges.get(target, []))))
+                    advanced = True
+                    break
+                if target in on_stack:
+                    lowlink[node] = min(lowlink[node], index[target])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                yield component
+
+
+class Stack:
+    """Immutable linked-list stack that shares its tail with the stack it grew from.
+
+    Push and pop are O(1) and never copy, so every branch of a search can
+    hold its own stack cheaply. The hash is computed once per node from the
+    top symbol and the hash of the rest, and equality stops as soon as two
+    stacks reach a shared node.
+    """
+    __slots__ = ('top', 'rest', '_length', '_hash')
+
+    def __init__(self, top=None, rest=None):
+        self.top = top
+        self.rest = rest
+        if rest is None:
+            self._length = 0
+            self._hash = hash(())
+        else:
+            self._length = rest._length + 1
+            self._hash = hash((top, rest._hash))
+
+    @classmethod
+    def from_symbols(cls, symbols):
+        """Build a stack of symbol IDs whose first one is the top"""
+        stack = EMPTY_STACK
+        for symbol in reversed(symbols):
+            stack = cls(symbol, stack)
+        return stack
+
+    def push(self, symbols):
+        """Return a new stack with symbols on top, the first one topmost"""
+        stack = self
+        for symbol in reversed(symbols):
+            stack = Stack(symbol, stack)
+        return stack
+
+    def pop(self):
+        """Return the stack below the top symbol"""
+        return self.rest if self._length else self
+
+    def drop(self, count):
+        """Return the stack below the top count symbols"""
+        node = self
+        while count > 0 and node._length:
+            node = node.rest
+            count -= 1
+        return node
+
+    def peek(self, count):
+        """Return up to count symbols from the top down"""
+        symbols = []
+        node = self
+        while node._length and len(symbols) < count:
+            symbols.append(node.top)
+            node = node.rest
+        return symbols
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        node = self
+        while node._length:
+            yield node.top
+            node = node.rest
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, Stack):
+            return NotImplemented
+        a, b = self, other
+        while a is not b:
+            if a._length != b._length or a._hash != b._hash or a.top != b.top:
+                return False
+            a, b = a.rest, b.rest
+        return True
+
+    def __repr__(self):
+        # Symbols are IDs from CompiledPDA.symbol_names; Simulation.stack_text() shows names
+        return f"Stack({tuple(self)!r})"
+
+
+EMPTY_STACK = Stack()
+
+
+class StackRuns:
+    """Run-length view of a Stack: (symbol, count) runs from the top down.
+
+    Immutable and tail-sharing like Stack, so the runs of a configuration
+    can be derived from its parent's in time proportional to the symbols
+    pushed, however deep the stack below them is.
+    """
+    __slots__ = ('symbol', 'count', 'rest', '_runs')
+
+    def __init__(self, symbol=None, count=0, rest=None):
+        self.symbol = symbol
+        self.count = count
+        self.rest = rest
+        self._runs = 0 if rest is None else rest._runs + 1
+
+    @classmethod
+    def from_stack(cls, stack):
+        """Build the runs of a stack by scanning all of it"""
+        runs = []
+        for symbol in stack:
+            if runs and runs[-1][0] == symbol:
+                runs[-1][1] += 1
+            else:
+                runs.append([symbol, 1])
+        result = EMPTY_RUNS
+        for symbol, count in reversed(runs):
+            result = cls(symbol, count, result)
+        return result
+
+    def push(self, symbols):
+        """Return the runs with symbols on top, the first one topmost"""
+        runs = self
+        for symbol in reversed(symbols):
+            if runs._runs and runs.symbol == symbol:
+                runs = StackRuns(symbol, runs.count + 1, runs.rest)
+            else:
+                runs = StackRuns(symbol, 1, runs)
+        return runs
+
+    def pop(self):
+        """Return the runs without the top symbol"""
+        if not self._runs:
+            return self
+        if self.count > 1:
+            return StackRuns(self.symbol, self.count - 1, self.rest)
+        return self.rest
+
+    def derive(self, parent_stack, stack):
+        """Return the runs of stack, given that these are the runs of parent_stack.
+
+        Works when stack is parent_stack popped once with symbols pushed on
+        the shared rest, as after any move; otherwise returns None.
+        """
+        if not parent_stack:
+            return None
+        base = parent_stack.rest
+        pushed = len(stack) - len(base)
+        if pushed < 0 or stack.drop(pushed) is not base:
+            return None
+        return self.pop().push(stack.peek(pushed))
+
+    def __len__(self):
+        return self._runs
+
+    def __iter__(self):
+        runs = self
+        while runs._runs:
+            yield runs.symbol, runs.count
+            runs = runs.rest
+
+
+EMPTY_RUNS = StackRuns()
+
+
+class Configuration:
+    # Live frontiers and trace histories hold many of these; no per-object __dict__
+    __slots__ = ('state', 'input_buffer', 'position', 'stack', 'parent', 'transition_taken')
+
+    def __init__(self, state, input_buffer, position, stack, parent=None, transition_taken=None):
+        self.state = state
+        self.input_buffer = input_buffer  # Shared by every configuration of a run
+        self.position = position          # Index of the next symbol to read
+        self.stack = stack
+        self.parent = parent
+        self.transition_taken = transition_taken  # Stores information about how we got here
+
+    @property
+    def input_left(self):
+        """Number of input symbols not read yet"""
+        return len(self.input_buffer) - self.position
+
+    @property
+    def remaining_input(self):
+        """Unread input as a string; this copies, so keep it to display code"""
+        return self.peek_input(self.input_left)
+
+    def peek_input(self, count):
+        """Return up to count unread input symbols as a string"""
+        upcoming = self.input_buffer[self.position:self.position + count]
+        if isinstance(upcoming, str):
+            return upcoming
+        return bytes(upcoming).decode('latin-1')
+
+    def key(self):
+        """Canonical (state, input position, stack) triple for deduplication"""
+        return (self.state, self.position, self.stack)
+
+    def __repr__(self):
+        # State and stack symbols are compiled IDs; Simulation.describe() shows names
+        return (f"Configuration(state={self.state}, position={self.position}, "
+                f"input={self.peek_input(20)!r}, stack={self.stack!r})")
+
+
+class ConfigurationTable:
+    """Struct-of-arrays store for configurations recorded step by step.
+
+    Each row holds a state number, a stack cell ID, an input offset, an
+    interned transition ID and the row of its parent, all in typed arrays.
+    Stacks are kept as cells (symbol, cell below) in two more arrays; a row whose
+    stack grew from its parent's only adds cells for the symbols it pushed,
+    so a recorded run costs a few machine words per row instead of a full
+    Configuration object and its stack nodes.
+    """
+
+    # The typed arrays holding rows and stack cells, in the order write() stores them
+    ARRAYS = ('state_ids', 'stack_ids', 'positions', 'transition_ids', 'parents', 'cell_symbols', 'cell_below')
+
+    def __init__(self, input_buffer):
+        self.input_buffer = input_buffer
+        self.transition_names = [None]
+        self._transition_ids = {None: 0}
+        self.state_ids = array('I')
+        self.stack_ids = array('q')
+        self.positions = array('Q')
+        self.transition_ids = array('I')
+        self.parents = array('q')
+        self.cell_symbols = array('I')
+        self.cell_below = array('q')  # -1 marks the bottom of a stack
+        self._last_rows = {}  # Rows of the previous batch, to resolve parents
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _intern_transition(self, transition):
+        transition_id = self._transition_ids.get(transition)
+        if transition_id is None:
+            transition_id = self._transition_ids[transition] = len(self.transition_names)
+            self.transition_names.append(transition)
+        return transition_id
+
+    def _add_cells(self, symbols, below):
+        """Push symbols (topmost first) onto cell below and return the new top cell"""
+        for symbol in reversed(symbols):
+            self.cell_symbols.append(symbol)
+            self.cell_below.append(below)
+            below = len(self.cell_below) - 1
+        return below
+
+    def _stack_cell(self, stack, parent):
+        """Find or create the cell for stack, reusing the parent's cells where shared"""
+        if parent is not None:
+            parent_config, parent_row = parent
+            if stack is parent_config.stack:
+                return self.stack_ids[parent_row]
+            if parent_config.stack:
+                # A move pops one symbol and pushes a few; look for the shared base
+                base = parent_config.stack.rest
+                pushed = len(stack) - len(base)
+                if pushed >= 0 and stack.drop(pushed) is base:
+                    return self._add_cells(stack.peek(pushed), self.cell_below[self.stack_ids[parent_row]])
+        return self._add_cells(list(stack), -1)
+
+    def add(self, config, parent=None):
+        """Record one configuration and return its row.
+
+        parent is the (configuration, row) pair its stack grew from, if any.
+        """
+        self.state_ids.append(config.state)
+        self.stack_ids.append(self._stack_cell(config.stack, parent))
+        self.positions.append(config.position)
+        self.transition_ids.append(self._intern_transition(config.transition_taken))
+        self.parents.append(parent[1] if parent is not None else -1)
+        return len(self.positions) - 1
+
+    def extend(self, configs):
+        """Record one step's frontier, linking each row to its parent's row.
+
+        Returns the row of each configuration, in order. A configuration
+        carried over unchanged from the previous call keeps its row.
+        """
+        rows = {}
+        order = []
+        for config in configs:
+            previous = self._last_rows.get(id(config))
+            if previous is not None and previous[0] is config:
+                # A finished configuration carried over unchanged
+                rows[id(config)] = previous
+                order.append(previous[1])
+                continue
+            parent = None
+            if config.parent is not None:
+                entry = self._last_rows.get(id(config.parent))
+                if entry is not None and entry[0] is config.parent:
+                    parent = entry
+            rows[id(config)] = (config, self.add(config, parent))
+            order.append(rows[id(config)][1])
+        self._last_rows = rows
+        return order
+
+    def detach(self):
+        """Drop the references to the last recorded batch of live configurations.
+
+        The table holds the last batch so the next extend() can find parent
+        rows, and through their parent links that keeps every ancestor
+        object alive. Call this when the run is over and only the rows are
+        still needed.
+        """
+        self._last_rows = {}
+
+    def _stack(self, cell, stacks):
+        """Rebuild the stack whose top is cell, reusing the nodes in stacks (cell -> Stack)"""
+        missing = []
+        while cell >= 0 and cell not in stacks:
+            missing.append(cell)
+            cell = self.cell_below[cell]
+        stack = stacks[cell] if cell >= 0 else EMPTY_STACK
+        for cell in reversed(missing):
+            stack = stacks[cell] = Stack(self.cell_symbols[cell], stack)
+        return stack
+
+    def stack_at(self, row):
+        """Rebuild the stack recorded at row"""
+        return self._stack(self.stack_ids[row], {})
+
+    def get(self, row):
+        """Rebuild the configuration at row, without its parent link"""
+        return Configuration(
+            self.state_ids[row],
+            self.input_buffer,
+            self.positions[row],
+            self.stack_at(row),
+            None,
+            self.transition_names[self.transition_ids[row]]
+        )
+
+    def rebuild(self, rows, known=None, stacks=None):
+        """Rebuild the configurations at rows, linked to their recorded parents.
+
+        Ancestors are rebuilt too, as far back as the table goes, and rows
+        sharing stack cells share Stack nodes. known (row -> Configuration)
+        and stacks (cell -> Stack) hold what earlier calls rebuilt; pass the
+        same dicts again to reuse it when walking through steps.
+        """
+        known = {} if known is None else known
+        stacks = {} if stacks is None else stacks
+        configs = []
+        for row in rows:
+            missing = []
+            while row >= 0 and row not in known:
+                missing.append(row)
+                row = self.parents[row]
+            config = known[row] if row >= 0 else None
+            for row in reversed(missing):
+                config = known[row] = Configuration(
+                    self.state_ids[row],
+                    self.input_buffer,
+                    self.positions[row],
+                    self._stack(self.stack_ids[row], stacks),
+                    config,
+                    self.transition_names[self.transition_ids[row]]
+                )
+            configs.append(config)
+        return configs
+
+    def write(self, file):
+        """Write the rows and stack cells to a binary file for read() to load"""
+        for name in self.ARRAYS:
+            values = getattr(self, name)
+            file.write(array('q', (len(values),)).tobytes())
+            file.write(values.tobytes())
+
+    @classmethod
+    def read(cls, file, input_buffer, transition_names):
+        """Load a table written by write(), for rebuilding only; nothing more can be added"""
+        table = cls(input_buffer)
+        table.transition_names = transition_names
+        for name in cls.ARRAYS:
+            values = getattr(table, name)
+            length = array('q')
+            length.frombytes(file.read(8))
+            values.frombytes(file.read(values.itemsize * length[0]))
+        return table
+
+    def path(self, row):
+        """Return the transitions taken from the first recorded row to row"""
+        transitions = []
+        while row >= 0:
+            transition = self.transition_names[self.transition_ids[row]]
+            if transition is not None:
+                transitions.append(transition)
+            row = self.parents[row]
+        transitions.reverse()
+        return transitions
+
+
+def pda_from_dict(config):
+    """Build a PDA from the dictionary layout used by the JSON machine files.
+
+    A transition's stack_push is either a string, split by tokenize_push(),
+    or a list of stack symbol names, top first, for symbols longer than one
+    character.
+    """
+    pda = PDA()
+    pda.states = {s.strip() for s in config.get("states", [])}
+    pda.alphabet = {s.strip() for s in config.get("alphabet", [])}
+    pda.alphabet.add(EPSILON)
+    pda.stack_symbols = {s.strip() for s in config.get("stack_symbols", [])}
+
+    pda.initial_state = config.get("initial_state", "").strip()
+    if pda.initial_state not in pda.states:
+        raise ValueError(f"Initial state '{pda.initial_state}' not in state set")
+
+    pda.initial_stack_symbol = config.get("initial_stack_symbol", "").strip()
+    if pda.initial_stack_symbol not in pda.stack_symbols:
+        raise ValueError(f"Initial stack symbol '{pda.initial_stack_symbol}' not in stack symbol set")
+
+    pda.accept_states = {s.strip() for s in config.get("accept_states", [])}
+    for state in pda.accept_states:
+        if state not in pda.states:
+            raise ValueError(f"Accept state '{state}' not in state set")
+
+    for transition in config.get("transitions", []):
+        state = transition.get("from_state", "").strip()
+        input_symbol = normalize_epsilon(transition.get("input_symbol", "").strip())
+        stack_symbol = transition.get("stack_symbol", "").strip()
+        next_state = transition.get("to_state", "").strip()
+        stack_push = tokenize_push(transition.get("stack_push", ""), pda.stack_symbols)
+
+        if state not in pda.states:
+            raise ValueError(f"State '{state}' in transition not in state set")
+        if next_state not in pda.states:
+            raise ValueError(f"Next state '{next_state}' in transition not in state set")
+        if input_symbol != EPSILON and input_symbol not in pda.alphabet:
+            raise ValueError(f"Input symbol '{input_symbol}' in transition not in alphabet")
+        if stack_symbol not in pda.stack_symbols:
+            raise ValueError(f"Stack symbol '{stack_symbol}' in transition not in stack symbol set")
+
+        # Like the GUI loader, silently accept push symbols missing from the set
+        pda.stack_symbols.update(stack_push)
+
+        pda.add_transition(state, input_symbol, stack_symbol, next_state, stack_push)
+
+    pda.analyse_epsilon()
+    pda.analyse_liveness()
+    return pda
+
+
+def load_pda_json(file_path):
+    """Load a PDA from one of the JSON machine files"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return pda_from_dict(json.load(file))
+
+
+def open_input(file_path):
+    """Memory-map an input file for simulation without reading it into memory.
+
+    The returned memoryview can be passed anywhere an input string is
+    accepted; each byte is read as one input symbol. A single trailing
+    newline is left out.
+    """
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return memoryview(b'')
+        view = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    if view[-1:] == b'\n':
+        view = view[:-1]
+    return view
+
+
+class Simulation:
+    """Breadth-first exploration of every branch of a PDA on one input.
+
+    Each call to step() expands all active configurations by one move. A
+    configuration that has consumed its input and has no move left stays in
+    the frontier, so a finished run keeps its final configurations around.
+
+    Every configuration ever generated is remembered by its key(), and a
+    successor that was already seen is dropped. The frontier therefore grows
+    with the number of distinct configurations rather than with the number
+    of paths, and each kept configuration's parent chain is the first path
+    that reached it.
+    """
+
+    def __init__(self, pda, input_string):
+        self.pda = pda
+        self.machine = pda.compile()
+        self.input_string = input_string
+        self.steps = 0
+        # Only set when the machine has a growing epsilon cycle
+        self.stack_bound = pda.stack_bound(len(input_string))
+        self.pruned = 0  # Successors dropped for exceeding stack_bound
+        self.doomed = 0  # Successors dropped because they can never accept
+        # Input may be a str, bytes or a memoryview from open_input()
+        self._byte_input = not isinstance(input_string, str)
+        initial_stack = Stack.from_symbols(self.machine.initial_stack)
+        self.configs = [Configuration(self.machine.initial_state, input_string, 0, initial_stack)]
+        self.visited = {self.configs[0].key()}
+        self.duplicates = 0  # Successors dropped because they were already seen
+        self.accepting_config = None
+        self._check_accepting(self.configs)
+
+    @property
+    def accepted(self):
+        """True once any branch has consumed the input in an accept state"""
+        return self.accepting_config is not None
+
+    def state_name(self, config):
+        """Name of the state a configuration is in"""
+        return self.machine.state_names[config.state]
+
+    def stack_symbols(self, config, count=None):
+        """Names of the stack symbols from the top down, at most count of them"""
+        symbol_ids = config.stack.peek(len(config.stack) if count is None else count)
+        return [self.machine.symbol_names[symbol] for symbol in symbol_ids]
+
+    def stack_text(self, config, count=None):
+        """The stack as text, top first, at most count symbols of it"""
+        return self.machine.symbol_separator.join(self.stack_symbols(config, count))
+
+    def runs_text(self, runs, limit=8):
+        """Summarise stack runs as text such as "A×50000, Z", top first"""
+        parts = []
+        for symbol, count in runs:
+            if len(parts) == limit:
+                parts.append(f"... {len(runs) - limit} more runs")
+                break
+            name = self.machine.symbol_names[symbol]
+            parts.append(f"{name}×{count}" if count > 1 else name)
+        return ", ".join(parts)
+
+    def describe(self, config):
+        """One-line description of a configuration using state and symbol names"""
+        return f"State: {self.state_name(config)}, Input: {config.remaining_input}, Stack: {self.stack_text(config)}"
+
+    def is_accepting(self, config):
+        """Check if a configuration has read all input in an accept state"""
+        return not config.input_left and self.machine.accepting[config.state]
+
+    def _moves(self, config):
+        """Look up the moves of a configuration in the compiled table"""
+        stack = config.stack
+        if not stack:
+            return ()
+        machine = self.machine
+        position = config.position
+        buffer = config.input_buffer
+        if position < len(buffer):
+            if self._byte_input:
+                input_id = machine.byte_input_ids[buffer[position]]
+            else:
+                input_id = machine.input_ids.get(buffer[position], machine.epsilon_input)
+        else:
+            input_id = machine.epsilon_input
+        return machine.table[(config.state * (machine.epsilon_input + 1) + input_id) * len(machine.symbol_names) + stack.top]
+
+    def is_doomed(self, state, position, stack):
+        """True if a configuration cannot accept now or after any further moves"""
+        machine = self.machine
+        if position == len(self.input_string) and machine.accepting[state]:
+            return False
+        if not machine.live[state] or not stack:
+            return True
+        return not machine.readable[state * len(machine.symbol_names) + stack.top]
+
+    def can_take_epsilon_transition(self, config):
+        """Check if the configuration can take an epsilon transition"""
+        if not config.stack:
+            return False
+
+        machine = self.machine
+        return bool(machine.table[machine.index(config.state, machine.epsilon_input, config.stack.top)])
+
+    def is_finished(self):
+        """True when no active configuration can move any further"""
+        for config in self.configs:
+            if config.input_left or self.can_take_epsilon_transition(config):
+                return False
+        return True
+
+    def step(self):
+        """Advance every active configuration by one move"""
+        new_configs = []
+        visited = self.visited
+        stack_bound = self.stack_bound
+        machine = self.machine
+        live = machine.live
+        readable = machine.readable
+        accepting = machine.accepting
+        symbol_count = len(machine.symbol_names)
+        length = len(self.input_string)
+
+        for config in self.configs:
+            moves = self._moves(config)
+
+            for next_state, consumes, push, transition_info in moves:
+                new_stack = config.stack.rest
+                for symbol in push:
+                    new_stack = Stack(symbol, new_stack)
+                if stack_bound is not None and len(new_stack) > stack_bound:
+                    self.pruned += 1
+                    continue
+                position = config.position + 1 if consumes else config.position
+                # Inlined is_doomed(): drop branches with no accepting future
+                if not (position == length and accepting[next_state]) and (
+                        not live[next_state] or not new_stack
+                        or not readable[next_state * symbol_count + new_stack.top]):
+                    self.doomed += 1
+                    continue
+                key = (next_state, position, new_stack)
+                if key in visited:
+                    self.duplicates += 1
+                    continue
+                visited.add(key)
+                new_configs.append(Configuration(
+                    next_state,
+                    config.input_buffer,
+                    position,
+                    new_stack,
+                    config,
+                    transition_info
+                ))
+
+            # If no transitions taken and there's no input left
+            if not moves and not config.input_left:
+                new_configs.append(config)  # Keep this config as is
+
+        self.configs = new_configs
+        self.steps += 1
+        self._check_accepting(new_configs)
+        return new_configs
+
+    def _check_accepting(self, configs):
+        if self.accepting_config is not None:
+            return
+        for config in configs:
+            if self.is_accepting(config):
+                self.accepting_config = config
+                return
+
+
+def transition_path(config):
+    """Return the transitions taken to reach config, first move first"""
+    transitions = []
+    while config is not None and config.transition_taken is not None:
+        transitions.append(config.transition_taken)
+        config = config.parent
+    transitions.reverse()
+    return transitions
+
+
+class RunResult:
+    """Outcome of a headless run.
+
+    accepted and finished mean the same whichever way run() went, but steps
+    and explored count different things on the two paths. A Simulation
+    step expands the whole frontier by one compiled move, and a chain of
+    top-rewriting epsilon moves is folded into one move, so the chain costs
+    a single step; explored counts the distinct configurations it kept,
+    leaving out branches dropped as doomed. run_deterministic() counts every
+    transition as a step, a chain included, and explored is steps + 1, one
+    configuration per move. On wcw the fast path reports 7 steps for
+    "abcba" and Simulation 6. max_steps is measured in the same units as
+    steps, so compare step counts only between runs that took the same path.
+    """
+
+    def __init__(self, accepted, steps, configs, accepting_config, finished, explored=None):
+        self.accepted = accepted
+        self.steps = steps  # Frontier expansions, or transitions on the fast path
+        self.configs = configs
+        self.accepting_config = accepting_config
+        # False when the run stopped at max_steps before reaching an answer
+        self.finished = finished
+        # Distinct configurations the run created, the initial one included
+        self.explored = explored
+
+    @classmethod
+    def from_simulation(cls, simulation, finished):
+        return cls(simulation.accepted, simulation.steps, simulation.configs,
+                   simulation.accepting_config, finished, len(simulation.visited))
+
+    @property
+    def status(self):
+        if self.accepted:
+            return "accepted"
+        return "rejected" if self.finished else "undecided"
+
+    def __repr__(self):
+        return f"RunResult(status={self.status}, steps={self.steps}, active={len(self.configs)})"
+
+
+class PathReplay(Simulation):
+    """A Simulation that follows one recorded path instead of every branch.
+
+    path lists configurations from the initial one onwards, as reached by
+    parent links; each step() moves to the next one. Frontiers hold a
+    single configuration, so the GUI can replay a witness with its usual
+    controls.
+    """
+
+    def __init__(self, pda, input_string, path):
+        super().__init__(pda, input_string)
+        self.path = path
+        self.configs = [path[0]]
+
+    def is_finished(self):
+        return self.steps >= len(self.path) - 1
+
+    def step(self):
+        """Move to the next configuration on the path"""
+        if not self.is_finished():
+            self.configs = [self.path[self.steps + 1]]
+        self.steps += 1
+        self._check_accepting(self.configs)
+        return self.configs
+
+
+class SearchResult:
+    """Outcome of shortest_witness()"""
+
+    def __init__(self, accepting_config, moves, epsilon_moves, explored, finished):
+        self.accepting_config = accepting_config
+        self.moves = moves                  # Transitions on the witness path
+        self.epsilon_moves = epsilon_moves  # Of which epsilon transitions
+        self.explored = explored            # Configurations expanded by the search
+        # False when the search stopped at max_configs before reaching an answer
+        self.finished = finished
+
+    @property
+    def accepted(self):
+        return self.accepting_config is not None
+
+    @property
+    def witness(self):
+        """transition_taken strings of the accepting path, first move first, or None"""
+        if self.accepting_config is None:
+            return None
+        return transition_path(self.accepting_config)
+
+    def path(self):
+        """Configurations of the accepting path, initial one first"""
+        configs = []
+        config = self.accepting_config
+        while config is not None:
+            configs.append(config)
+            config = config.parent
+        configs.reverse()
+        return configs
+
+    @property
+    def status(self):
+        if self.accepted:
+            return "accepted"
+        return "rejected" if self.finished else "undecided"
+
+    def __repr__(self):
+        return (f"SearchResult(status={self.status}, moves={self.moves}, "
+                f"epsilon_moves={self.epsilon_moves}, explored={self.explored})")
+
+
+def shortest_witness(pda, input_string, metric="moves", max_configs=None, cancel=None):
+    """Find an accepting computation with the fewest moves or fewest epsilon moves.
+
+    A uniform-cost search over the same deduplicated configurations as
+    Simulation: each configuration is kept with the cheapest cost found so
+    far, and the search stops at the first accepting configuration taken off
+    the queue, which is optimal. Costs count the transitions inside folded
+    epsilon chains. metric "moves" minimises transitions, then epsilon
+    transitions; "epsilon" the other way round. Gives up after expanding
+    max_configs configurations, or once cancel, an object with an is_set()
+    method such as a threading.Event, is set.
+    """
+    if metric not in SEARCH_METRICS:
+        raise ValueError(f"Unknown search metric '{metric}'")
+    simulation = Simulation(pda, input_string)
+    stack_bound = simulation.stack_bound
+    start = simulation.configs[0]
+
+    # Queue entries: ((primary, secondary), tie-breaker, config)
+    queue = [((0, 0), 0, start)]
+    best = {start.key(): (0, 0)}
+    pushed = 1
+    explored = 0
+    while queue:
+        cost, _, config = heapq.heappop(queue)
+        if best[config.key()] < cost:
+            continue  # A cheaper way here was found after this entry was queued
+        if simulation.is_accepting(config):
+            moves, epsilon_moves = cost if metric == "moves" else cost[::-1]
+            return SearchResult(config, moves, epsilon_moves, explored, True)
+        if max_configs is not None and explored >= max_configs:
+            return SearchResult(None, None, None, explored, False)
+        if cancel is not None and cancel.is_set():
+            return SearchResult(None, None, None, explored, False)
+        explored += 1
+
+        for next_state, consumes, push, transition_info in simulation._moves(config):
+            new_stack = config.stack.rest
+            for symbol in push:
+                new_stack = Stack(symbol, new_stack)
+            if stack_bound is not None and len(new_stack) > stack_bound:
+                continue
+            position = config.position + 1 if consumes else config.position
+            if simulation.is_doomed(next_state, position, new_stack):
+                continue
+            # Folded epsilon chains cost one per transition they stand for
+            length = 1 if consumes else transition_info.count("; ") + 1
+            epsilon_length = 0 if consumes else length
+            if metric == "moves":
+                new_cost = (cost[0] + length, cost[1] + epsilon_length)
+            else:
+                new_cost = (cost[0] + epsilon_length, cost[1] + length)
+            key = (next_state, position, new_stack)
+            known = best.get(key)
+            if known is not None and known <= new_cost:
+                continue
+            best[key] = new_cost
+            heapq.heappush(queue, (new_cost, pushed, Configuration(
+                next_state, config.input_buffer, position, new_stack, config, transition_info)))
+            pushed += 1
+
+    return SearchResult(None, None, None, explored, True)
+
+
+class DecisionResult:
+    """Outcome of decide()"""
+
+    def __init__(self, accepted, summaries, pops):
+        self.accepted = accepted
+        self.summaries = summaries  # (state, top, position) triples expanded
+        self.pops = pops            # (state, position) results found for them
+        self.finished = True        # decide() always reaches an answer
+
+    @property
+    def status(self):
+        return "accepted" if self.accepted else "rejected"
+
+    def __repr__(self):
+        return f"DecisionResult(status={self.status}, summaries={self.summaries}, pops={self.pops})"
+
+
+def decide(pda, input_string):
+    """Decide whether pda accepts input_string in time polynomial in its length.
+
+    Instead of following every branch with its whole stack, this computes
+    summaries: for each (state p, top symbol A, position i) that some run
+    reaches, the (state q, position j) pairs in which the run can have
+    popped that A, whatever lies below it. A move from (p, A, i) pushing
+    B1..Bk (top first) pops A once B1 is popped, then B2 from where that left
+    off, and so on, so every summary is built from shorter ones as in an
+    Earley or GLR parser. Each of the O(n) summaries per (p, A) has O(n)
+    results and waits on O(n) others, which bounds the work by O(n^3) for a
+    fixed machine, with no stack bound needed for epsilon cycles.
+
+    A summary's level accepts if an accepting configuration is reached
+    before A is popped: at its own start, or at the start of any summary
+    its moves wait on. The input is accepted if the initial level accepts
+    or the initial stack symbol can be popped in an accept state at the end
+    of the input. Branches is_doomed() would drop are skipped here too.
+    """
+    machine = pda.compile()
+    length = len(input_string)
+    width = length + 1
+    symbol_count = len(machine.symbol_names)
+    stride = machine.epsilon_input + 1
+    table = machine.table
+    accepting = machine.accepting
+    live = machine.live
+    readable = machine.readable
+
+    if isinstance(input_string, str):
+        input_ids = [machine.input_ids.get(symbol, machine.epsilon_input) for symbol in input_string]
+    else:
+        input_ids = [machine.byte_input_ids[symbol] for symbol in input_string]
+    input_ids.append(machine.epsilon_input)
+
+    # Summary keys and results are packed into ints:
+    # key = (state * symbol_count + top) * width + position, result = state * width + position
+    pops = {}     # key -> set of results
+    waiting = {}  # key -> set of (origin key, push top first, index of the symbol popped)
+    pending = deque()  # ("expand", key) and ("result", key, result) events
+
+    def wait(key, origin, push, index):
+        if key not in pops:
+            pops[key] = set()
+            waiting[key] = set()
+            pending.append(("expand", key))
+        continuation = (origin, push, index)
+        if continuation in waiting[key]:
+            return
+        waiting[key].add(continuation)
+        for result in tuple(pops[key]):
+            resume(continuation, result)
+
+    def resume(continuation, result):
+        origin, push, index = continuation
+        index += 1
+        if index < len(push):
+            state, position = divmod(result, width)
+            wait((state * symbol_count + push[index]) * width + position, origin, push, index)
+        elif result not in pops[origin]:
+            pops[origin].add(result)
+            pending.append(("result", origin, result))
+
+    start = (machine.initial_state * symbol_count + machine.initial_stack[0]) * width
+    pops[start] = set()
+    waiting[start] = set()
+    pending.append(("expand", start))
+    while pending:
+        event = pending.popleft()
+        key = event[1]
+        if event[0] == "result":
+            for continuation in tuple(waiting[key]):
+                resume(continuation, event[2])
+            continue
+
+        rest, position = divmod(key, width)
+        state, top = divmod(rest, symbol_count)
+        for next_state, consumes, push, _ in table[(state * stride + input_ids[position]) * symbol_count + top]:
+            next_position = position + 1 if consumes else position
+            if not live[next_state] and not (next_position == length and accepting[next_state]):
+                continue
+            if not push:
+                result = next_state * width + next_position
+                if result not in pops[key]:
+                    pops[key].add(result)
+                    pending.append(("result", key, result))
+                continue
+            push = push[::-1]
+            if not readable[next_state * symbol_count + push[0]] and not (
+                    next_position == length and accepting[next_state]):
+                continue
+            wait((next_state * symbol_count + push[0]) * width + next_position, key, push, 0)
+
+    # Levels that reach an accepting configuration, and every level they run inside
+    accepting_levels = [key for key in pops
+                        if key % width == length and accepting[key // width // symbol_count]]
+    accepted_keys = set(accepting_levels)
+    for key in accepting_levels:
+        for origin, _, _ in waiting[key]:
+            if origin not in accepted_keys:
+                accepted_keys.add(origin)
+                accepting_levels.append(origin)
+    accepted = start in accepted_keys or any(
+        result % width == length and accepting[result // width] for result in pops[start])
+    return DecisionResult(accepted, len(pops), sum(len(results) for results in pops.values()))
+
+
+def run_deterministic(pda, input_string, max_steps=None):
+    """Run a deterministic PDA on a single configuration with a list stack.
+
+    Only valid when pda.compile().deterministic is True; run() checks this
+    and picks this loop automatically. Each move is one table index, a list
+    pop and a list extend, so a run is O(n) with no frontier bookkeeping.
+    The returned configurations have no parent links.
+    """
+    machine = pda.compile()
+    table = machine.deterministic_table
+    accepting = machine.accepting
+    width = machine.epsilon_input + 1
+    symbol_count = len(machine.symbol_names)
+    epsilon_input = machine.epsilon_input
+    byte_input = not isinstance(input_string, str)
+    input_ids = machine.byte_input_ids if byte_input else machine.input_ids
+    length = len(input_string)
+
+    state = machine.initial_state
+    stack = list(reversed(machine.initial_stack))  # Top of stack is the last item
+    position = 0
+    steps = 0
+    transition_info = None
+
+    def snapshot():
+        return Configuration(state, input_string, position, Stack.from_symbols(stack[::-1]),
+                             None, transition_info)
+
+    while True:
+        if position == length and accepting[state]:
+            config = snapshot()
+            return RunResult(True, steps, [config], config, True, steps + 1)
+        if max_steps is not None and steps >= max_steps:
+            return RunResult(False, steps, [snapshot()], None, False, steps + 1)
+        if not stack:
+            break
+        if position < length:
+            if byte_input:
+                input_id = input_ids[input_string[position]]
+            else:
+                input_id = input_ids.get(input_string[position], epsilon_input)
+        else:
+            input_id = epsilon_input
+        move = table[(state * width + input_id) * symbol_count + stack[-1]]
+        if move is None:
+            break
+        state, consumes, push, transition_info = move
+        stack.pop()
+        stack.extend(push)
+        if consumes:
+            position += 1
+        steps += 1
+
+    # Stuck: keep the final configuration only if it read all its input, like Simulation
+    configs = [snapshot()] if position == length else []
+    return RunResult(False, steps, configs, None, True, steps + 1)
+
+
+def run(pda, input_string, max_steps=None, fast_path=True):
+    """Simulate pda on input_string until it accepts, dies out or hits max_steps.
+
+    Deterministic machines use run_deterministic() unless fast_path is
+    False; pass False when the accepting configuration's parent links are
+    needed, for example for transition_path(). The two paths count steps
+    and explored differently, as RunResult describes.
+    """
+    if fast_path and pda.compile().deterministic:
+        return run_deterministic(pda, input_string, max_steps)
+
+    simulation = Simulation(pda, input_string)
+    while not simulation.accepted:
+        if not simulation.configs or simulation.is_finished():
+            return RunResult.from_simulation(simulation, True)
+        if max_steps is not None and simulation.steps >= max_steps:
+            return RunResult.from_simulation(simulation, False)
+        simulation.step()
+    return RunResult.from_simulation(simulation, True)
+
+
+def accepts(pda, input_string, max_steps=None):
+    """Return True if pda accepts input_string"""
+    return run(pda, input_string, max_steps).accepted
+
+
+# What StreamRecognizer reports after each chunk of input
+STREAM_VIABLE = "viable"      # Not accepted yet, but some continuation may be
+STREAM_ACCEPTED = "accepted"  # The input read so far is accepted
+STREAM_DEAD = "dead"          # No continuation of the input can be accepted
+
+
+class StreamRecognizer:
+    """Acceptance check over input that arrives a piece at a time.
+
+    feed() takes any iterable of input symbols, such as a str chunk read
+    from a pipe or a bytes chunk read from a file, and moves every branch
+    past it. The frontier is kept closed under epsilon moves and holds only
+    (state, stack) pairs: no input buffer, positions or parent links, so
+    memory depends on the machine and the stacks its branches build rather
+    than on the input already read. Branches is_doomed() would drop are
+    dropped here too, which is what lets a stream be reported dead early.
+
+    Machines with a growing epsilon cycle are refused with a ValueError:
+    their epsilon closure is infinite, and a bounded one would grow with
+    the input read and take exponential work. decide() answers for them.
+    """
+
+    def __init__(self, pda):
+        if pda.epsilon_moves is None:
+            pda.analyse_epsilon()
+        if pda.growing_epsilon_cycle:
+            raise ValueError("The PDA has an epsilon cycle that grows the stack, so its input "
+                             "cannot be checked as a stream; use decide() on the whole input")
+        self.machine = pda.compile()
+        self.position = 0     # Input symbols fed so far, those after the stream died included
+        self.accepted = False  # Whether the input read so far is accepted
+        self.doomed = 0       # Configurations dropped as unable to accept
+        start = Stack.from_symbols(self.machine.initial_stack)
+        self.configs = self._close([(self.machine.initial_state, start)])
+
+    @property
+    def status(self):
+        if self.accepted:
+            return STREAM_ACCEPTED
+        return STREAM_VIABLE if self.configs else STREAM_DEAD
+
+    def copy(self):
+        """Return an independent recognizer at the same point of the input.
+
+        Frontier entries are immutable, so the copy shares them and costs
+        one list.
+        """
+        other = StreamRecognizer.__new__(StreamRecognizer)
+        other.machine = self.machine
+        other.position = self.position
+        other.accepted = self.accepted
+        other.doomed = self.doomed
+        other.configs = list(self.configs)
+        return other
+
+    def feed(self, symbols):
+        """Read more input and return the status after it"""
+        machine = self.machine
+        table = machine.table
+        symbol_count = len(machine.symbol_names)
+        stride = machine.epsilon_input + 1
+        byte_input = isinstance(symbols, (bytes, bytearray, memoryview))
+        remaining = iter(symbols)
+        for symbol in remaining:
+            if not self.configs:
+                # Accepted up to here, but no branch can read on; count the rest as read
+                self.accepted = False
+                self.position += 1 + sum(1 for _ in remaining)
+                break
+            if byte_input:
+                input_id = machine.byte_input_ids[symbol]
+            else:
+                input_id = machine.input_ids.get(symbol, machine.epsilon_input)
+            moved = []
+            for state, stack in self.configs:
+                for next_state, consumes, push, _ in table[(state * stride + input_id) * symbol_count + stack.top]:
+                    if not consumes:
+                        continue  # The frontier already holds its epsilon successors
+                    new_stack = stack.rest
+                    for pushed in push:
+                        new_stack = Stack(pushed, new_stack)
+                    moved.append((next_state, new_stack))
+            self.position += 1
+            self.configs = self._close(moved)
+        return self.status
+
+    def _close(self, seeds):
+        """Return seeds with every configuration reachable by epsilon moves, minus doomed ones.
+
+        Finite since the machine has no growing epsilon cycle.
+        """
+        machine = self.machine
+        table = machine.table
+        symbol_count = len(machine.symbol_names)
+        stride = machine.epsilon_input + 1
+        accepting = machine.accepting
+        live = machine.live
+        readable = machine.readable
+
+        self.accepted = False
+        seen = set(seeds)
+        queue = deque(seen)
+        configs = []
+        while queue:
+            config = queue.popleft()
+            state, stack = config
+            if accepting[state]:
+                self.accepted = True
+            if not live[state] or not stack or not readable[state * symbol_count + stack.top]:
+                self.doomed += 1
+                continue
+            configs.append(config)
+            for next_state, _, push, _ in table[(state * stride + machine.epsilon_input) * symbol_count + stack.top]:
+                new_stack = stack.rest
+                for pushed in push:
+                    new_stack = Stack(pushed, new_stack)
+                successor = (next_state, new_stack)
+                if successor not in seen:
+                    seen.add(successor)
+                    queue.append(successor)
+        return configs
+
+
+def stream_statuses(pda, chunks):
+    """Feed chunks of input to a StreamRecognizer, yielding (symbols read, status) after each.
+
+    Stops taking chunks once the stream is dead, since nothing can revive it.
+    """
+    recognizer = StreamRecognizer(pda)
+    for chunk in chunks:
+        status = recognizer.feed(chunk)
+        yield recognizer.position, status
+        if status == STREAM_DEAD:
+            return
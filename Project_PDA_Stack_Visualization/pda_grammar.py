@@ -0,0 +1,313 @@
+"""Build PDAs from context-free grammars.
+
+A grammar file holds one rule per line, alternatives separated by "|":
+
+    # a^n b^n
+    S -> a S b | ε
+
+Every symbol on the left of "->" (or "→") is a nonterminal and the first one
+is the start symbol; everything else is a terminal, one input character
+each. Symbols on the right are separated by spaces, or written together as
+in "aSb" when the nonterminal names can be told apart. An empty alternative
+or ε derives the empty string.
+
+grammar_to_dict() uses the standard top-down construction: the stack holds
+the sentential form still to be matched, ε-moves expand the nonterminal on
+top by one of its rules, and reading a terminal pops it. The result uses the
+JSON machine layout, so it can be saved as is or passed to pda_from_dict().
+simplify() removes ε-rules, unit rules, useless symbols and left recursion
+first, which cuts the branches the simulation has to explore.
+"""
+import itertools
+import json
+
+from pda_engine import EPSILON, pda_from_dict, tokenize_push
+
+# File name endings the GUI and command line treat as grammars rather than JSON
+GRAMMAR_SUFFIXES = (".cfg", ".grammar")
+
+# Bottom-of-stack marker names, the first one not used by the grammar is taken
+BOTTOM_SYMBOLS = ("Z", "Z0", "$", "⊥")
+
+# States of the top-down construction
+START_STATE, LOOP_STATE, ACCEPT_STATE = "q0", "q1", "q2"
+
+
+class Grammar:
+    """A context-free grammar: rules map a nonterminal to its right-hand sides"""
+
+    def __init__(self, start, rules):
+        self.start = start
+        self.rules = rules  # nonterminal -> list of tuples of symbols
+
+    @property
+    def nonterminals(self):
+        return set(self.rules)
+
+    @property
+    def terminals(self):
+        return {symbol for bodies in self.rules.values() for body in bodies
+                for symbol in body if symbol not in self.rules}
+
+    def __str__(self):
+        lines = []
+        for head in sorted(self.rules, key=lambda head: head != self.start):
+            bodies = [" ".join(body) or EPSILON for body in self.rules[head]]
+            lines.append(f"{head} -> {' | '.join(bodies)}")
+        return "\n".join(lines)
+
+
+def parse_grammar(text):
+    """Parse grammar text in the format described in the module docstring"""
+    rules = {}
+    lines = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        head, arrow, body = line.replace("→", "->").partition("->")
+        head = head.strip()
+        if not arrow or not head or len(head.split()) > 1:
+            raise ValueError(f"Line {number}: expected 'Nonterminal -> body | body', got '{line}'")
+        rules.setdefault(head, [])
+        lines.append((head, body))
+    if not rules:
+        raise ValueError("Grammar has no rules")
+
+    # Bodies are split once every nonterminal is known
+    for head, body in lines:
+        for alternative in body.split("|"):
+            symbols = []
+            for word in alternative.split():
+                if word in rules:
+                    symbols.append(word)
+                else:
+                    # Unknown characters become one-character terminals
+                    symbols.extend(tokenize_push(word, rules))
+            body = tuple(symbols)
+            if body not in rules[head]:
+                rules[head].append(body)
+
+    for head, bodies in rules.items():
+        for body in bodies:
+            for symbol in body:
+                if symbol not in rules and len(symbol) != 1:
+                    raise ValueError(f"Terminal '{symbol}' in a rule for {head} is not one character")
+    return Grammar(next(iter(rules)), rules)
+
+
+def load_grammar(file_path):
+    """Load a grammar from a text file"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return parse_grammar(file.read())
+
+
+def _fresh_name(name, taken):
+    while name in taken:
+        name += "'"
+    return name
+
+
+def nullable_symbols(grammar):
+    """Nonterminals that derive the empty string"""
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for head, bodies in grammar.rules.items():
+            if head not in nullable and any(all(symbol in nullable for symbol in body) for body in bodies):
+                nullable.add(head)
+                changed = True
+    return nullable
+
+
+def remove_epsilon_rules(grammar):
+    """Return an equivalent grammar whose only ε-rule, if any, is on a fresh start symbol"""
+    nullable = nullable_symbols(grammar)
+    rules = {}
+    for head, bodies in grammar.rules.items():
+        new_bodies = []
+        for body in bodies:
+            # Every way of leaving out nullable symbols
+            choices = [((symbol,), ()) if symbol in nullable else ((symbol,),) for symbol in body]
+            for parts in itertools.product(*choices):
+                new_body = tuple(symbol for part in parts for symbol in part)
+                if new_body and new_body not in new_bodies:
+                    new_bodies.append(new_body)
+        rules[head] = new_bodies
+
+    start = grammar.start
+    if start in nullable:
+        start = _fresh_name(grammar.start + "'", rules.keys() | grammar.terminals)
+        rules = {start: [(grammar.start,), ()], **rules}
+    return Grammar(start, rules)
+
+
+def remove_unit_rules(grammar):
+    """Return an equivalent grammar with no rules of the form A -> B"""
+    rules = {}
+    for head in grammar.rules:
+        # Nonterminals reachable from head through unit rules, head included
+        reached = [head]
+        for name in reached:
+            for body in grammar.rules[name]:
+                if len(body) == 1 and body[0] in grammar.rules and body[0] not in reached:
+                    reached.append(body[0])
+        bodies = []
+        for name in reached:
+            for body in grammar.rules[name]:
+                if not (len(body) == 1 and body[0] in grammar.rules) and body not in bodies:
+                    bodies.append(body)
+        rules[head] = bodies
+    return Grammar(grammar.start, rules)
+
+
+def remove_useless_symbols(grammar):
+    """Drop nonterminals that derive no terminal string or cannot be reached from the start"""
+    generating = set()
+    changed = True
+    while changed:
+        changed = False
+        for head, bodies in grammar.rules.items():
+            if head not in generating and any(
+                    all(symbol in generating or symbol not in grammar.rules for symbol in body)
+                    for body in bodies):
+                generating.add(head)
+                changed = True
+
+    rules = {head: [body for body in bodies
+                    if all(symbol in generating or symbol not in grammar.rules for symbol in body)]
+             for head, bodies in grammar.rules.items() if head in generating}
+    if grammar.start not in rules:
+        rules[grammar.start] = []  # The language is empty
+
+    reachable = [grammar.start]
+    for head in reachable:
+        for body in rules[head]:
+            for symbol in body:
+                if symbol in rules and symbol not in reachable:
+                    reachable.append(symbol)
+    return Grammar(grammar.start, {head: rules[head] for head in rules if head in reachable})
+
+
+def remove_left_recursion(grammar):
+    """Return an equivalent grammar with no left-recursive nonterminals.
+
+    The grammar must have no ε-rules other than on a start symbol that no
+    rule uses, and no unit cycles, as after remove_epsilon_rules() and
+    remove_unit_rules(). A nonterminal A with rules A -> A α | β gets a new
+    nonterminal A' with A -> β | β A' and A' -> α | α A'.
+    """
+    order = list(grammar.rules)
+    taken = set(order) | grammar.terminals
+    rules = {head: list(bodies) for head, bodies in grammar.rules.items()}
+    for i, head in enumerate(order):
+        # Substitute earlier nonterminals at the left so recursion through them becomes direct
+        earlier = set(order[:i])
+        changed = True
+        while changed:
+            changed = False
+            bodies = []
+            for body in rules[head]:
+                if body and body[0] in earlier:
+                    changed = True
+                    for replacement in rules[body[0]]:
+                        new_body = replacement + body[1:]
+                        if new_body not in bodies:
+                            bodies.append(new_body)
+                elif body not in bodies:
+                    bodies.append(body)
+            rules[head] = bodies
+
+        recursive = [body[1:] for body in rules[head] if body and body[0] == head]
+        if not recursive:
+            continue
+        others = [body for body in rules[head] if not body or body[0] != head]
+        tail = _fresh_name(head + "'", taken)
+        taken.add(tail)
+        rules[head] = others + [body + (tail,) for body in others]
+        rules[tail] = recursive + [body + (tail,) for body in recursive]
+    return Grammar(grammar.start, rules)
+
+
+def simplify(grammar):
+    """Remove ε-rules, unit rules, useless symbols and left recursion.
+
+    ε-rules go first since removing them can create unit rules, and unit
+    rules are removed again at the end since removing left recursion can
+    create them too (A' -> B for A -> A B). The top-down machine for the
+    result has no ε-cycles, so every branch ends.
+    """
+    grammar = remove_useless_symbols(remove_unit_rules(remove_epsilon_rules(grammar)))
+    return remove_useless_symbols(remove_unit_rules(remove_left_recursion(grammar)))
+
+
+def grammar_to_dict(grammar, input_string="", fold_terminals=True):
+    """Build a top-down PDA for grammar in the JSON machine layout.
+
+    The machine puts the start symbol over a bottom marker, expands
+    nonterminals on top of the stack with ε-moves and pops terminals that
+    match the input; it accepts on reaching the bottom marker with the input
+    read. With fold_terminals a rule whose body starts with a terminal reads
+    that terminal as part of the expansion, so a branch with the wrong rule
+    dies at once instead of one ε-move later. Left-recursive rules make
+    growing ε-cycles, which the simulation searches only to a bounded depth
+    and at great cost, so grammars that have them should be simplified.
+    """
+    nonterminals = grammar.nonterminals
+    terminals = grammar.terminals
+    bottom = next((name for name in BOTTOM_SYMBOLS if name not in nonterminals | terminals),
+                  _fresh_name("Z", nonterminals | terminals))
+    stack_symbols = sorted(nonterminals | terminals) + [bottom]
+    symbol_lists = any(len(symbol) > 1 for symbol in stack_symbols)
+
+    def push(symbols):
+        if not symbols:
+            return EPSILON
+        return list(symbols) if symbol_lists else "".join(symbols)
+
+    def transition(state, input_symbol, stack_symbol, next_state, symbols):
+        return {
+            "from_state": state,
+            "input_symbol": input_symbol,
+            "stack_symbol": stack_symbol,
+            "to_state": next_state,
+            "stack_push": push(symbols)
+        }
+
+    transitions = [transition(START_STATE, EPSILON, bottom, LOOP_STATE, (grammar.start, bottom))]
+    for head, bodies in grammar.rules.items():
+        for body in bodies:
+            if fold_terminals and body and body[0] in terminals:
+                transitions.append(transition(LOOP_STATE, body[0], head, LOOP_STATE, body[1:]))
+            else:
+                transitions.append(transition(LOOP_STATE, EPSILON, head, LOOP_STATE, body))
+    for terminal in sorted(terminals):
+        transitions.append(transition(LOOP_STATE, terminal, terminal, LOOP_STATE, ()))
+    transitions.append(transition(LOOP_STATE, EPSILON, bottom, ACCEPT_STATE, (bottom,)))
+
+    return {
+        "states": [START_STATE, LOOP_STATE, ACCEPT_STATE],
+        "alphabet": sorted(terminals),
+        "stack_symbols": stack_symbols,
+        "initial_state": START_STATE,
+        "initial_stack_symbol": bottom,
+        "accept_states": [ACCEPT_STATE],
+        "input_string": input_string,
+        "transitions": transitions
+    }
+
+
+def grammar_to_pda(grammar, clean=True, fold_terminals=True):
+    """Build a runnable PDA for grammar, simplifying it first if clean is set"""
+    if clean:
+        grammar = simplify(grammar)
+    return pda_from_dict(grammar_to_dict(grammar, fold_terminals=fold_terminals))
+
+
+def save_grammar_pda(grammar, file_path, input_string="", clean=True, fold_terminals=True):
+    """Write the PDA for grammar as a JSON machine file"""
+    if clean:
+        grammar = simplify(grammar)
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(grammar_to_dict(grammar, input_string, fold_terminals), file, indent=4, ensure_ascii=False)
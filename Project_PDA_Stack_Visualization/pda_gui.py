@@ -0,0 +1,1340 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog, filedialog
+import re
+import json
+import queue
+from collections import OrderedDict, defaultdict, deque, namedtuple
+import threading
+
+from pda_engine import (EPSILON, PDA, SEARCH_METRICS, PathReplay, Simulation, StackRuns, shortest_witness,
+                        tokenize_push)
+from pda_cache import RunCache
+from pda_grammar import GRAMMAR_SUFFIXES, grammar_to_dict, load_grammar, simplify
+from pda_history import HISTORY_POLICIES, TraceHistory
+from pda_profile import ProfiledSimulation
+
+# Most redraws per second while a run is animating
+FRAME_RATE = 30
+
+# Layout of one box in the traces panel
+TRACE_WIDTH = 150
+TRACE_SPACING = 20
+
+# Layout of the stack canvas
+STACK_CELL_HEIGHT = 40
+STACK_TOP_MARGIN = 120  # Room for the title and summary lines above the cells
+
+# Stack run summaries kept for reuse, and how far up the parents to look for one
+RUNS_CACHE_SIZE = 256
+RUNS_SEARCH_DEPTH = 10000
+
+# Configurations the shortest-path search may expand before giving up
+SEARCH_LIMIT = 200000
+
+# Orders offered for the traces panel
+TRACE_ORDERS = ("as found", "deepest stack", "most input read")
+
+# Heat overlay on the transitions box: lightest and hottest background
+HEAT_COOL = (255, 236, 224)
+HEAT_HOT = (255, 96, 64)
+
+# What the run thread hands to the Tk thread for drawing one step
+Snapshot = namedtuple("Snapshot", "step configs last_step duplicates doomed available")
+
+
+class StackVisualizer(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        
+        self.title("PDA Stack Visualizer")
+        self.geometry("1200x800")
+        
+        self.pda = PDA()
+        self.simulation = None
+        self.current_configs = []
+        self.history = None  # TraceHistory of the run, once a run starts
+        self.current_step = 0
+        self.is_running = False
+        self.execution_thread = None
+        self.stop_event = threading.Event()  # Wakes the run thread early when set
+        self.snapshots = None  # Queue from the run thread being drawn
+        self.search_results = None  # Queue from the shortest-path search being waited on
+        self.search_cancel = threading.Event()  # Stops that search when set
+        self.animation_speed = 1.0  # seconds between steps
+        self.max_speed = False  # Copy of the checkbox for the run thread
+        
+        # Canvas items kept between steps: key -> [item ID, coords, options]
+        self.stack_items = {}
+        self.trace_items = {}
+        
+        # Stack viewport: depth of the first cell in view, the last position
+        # walked to, and run summaries by stack
+        self.stack_offset = 0
+        self.stack_cursor = (None, 0, None)  # (stack, depth, node at that depth)
+        self.runs_cache = OrderedDict()  # id(stack) -> (stack, StackRuns)
+        
+        # Answers of finished runs, kept across resets and reloads of the same machine
+        self.run_results = RunCache()
+        
+        # Traces panel: first entry in view, and the entries built for current_configs
+        self.trace_offset = 0
+        self.trace_entries_source = None
+        self.trace_entries_key = None
+        self.trace_entries_cache = []
+        
+        self.create_widgets()
+        self.reset_visualization()
+        
+    def create_widgets(self):
+        # Main frame for the entire UI
+        main_frame = ttk.Frame(self)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Left panel for configuration and controls
+        left_panel = ttk.Frame(main_frame, width=400)
+        left_panel.pack(side=tk.LEFT, fill=tk.BOTH, padx=5, pady=5)
+        
+        # PDA Definition section
+        pda_frame = ttk.LabelFrame(left_panel, text="PDA Definition")
+        pda_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        ttk.Label(pda_frame, text="States (comma-separated):").pack(anchor=tk.W, padx=5, pady=2)
+        self.states_entry = ttk.Entry(pda_frame)
+        self.states_entry.pack(fill=tk.X, padx=5, pady=2)
+        self.states_entry.insert(0, "q0, q1, q2")
+        
+        ttk.Label(pda_frame, text="Alphabet (comma-separated):").pack(anchor=tk.W, padx=5, pady=2)
+        self.alphabet_entry = ttk.Entry(pda_frame)
+        self.alphabet_entry.pack(fill=tk.X, padx=5, pady=2)
+        self.alphabet_entry.insert(0, "a, b")
+        
+        ttk.Label(pda_frame, text="Stack Symbols (comma-separated):").pack(anchor=tk.W, padx=5, pady=2)
+        self.stack_symbols_entry = ttk.Entry(pda_frame)
+        self.stack_symbols_entry.pack(fill=tk.X, padx=5, pady=2)
+        self.stack_symbols_entry.insert(0, "Z, A, B")
+        
+        ttk.Label(pda_frame, text="Initial State:").pack(anchor=tk.W, padx=5, pady=2)
+        self.initial_state_entry = ttk.Entry(pda_frame)
+        self.initial_state_entry.pack(fill=tk.X, padx=5, pady=2)
+        self.initial_state_entry.insert(0, "q0")
+        
+        ttk.Label(pda_frame, text="Initial Stack Symbol:").pack(anchor=tk.W, padx=5, pady=2)
+        self.initial_stack_symbol_entry = ttk.Entry(pda_frame)
+        self.initial_stack_symbol_entry.pack(fill=tk.X, padx=5, pady=2)
+        self.initial_stack_symbol_entry.insert(0, "Z")
+        
+        ttk.Label(pda_frame, text="Accept States (comma-separated):").pack(anchor=tk.W, padx=5, pady=2)
+        self.accept_states_entry = ttk.Entry(pda_frame)
+        self.accept_states_entry.pack(fill=tk.X, padx=5, pady=2)
+        self.accept_states_entry.insert(0, "q2")
+        
+        ttk.Label(pda_frame, text="Transitions (state,input,stack→next_state,push):").pack(anchor=tk.W, padx=5, pady=2)
+        self.transitions_text = tk.Text(pda_frame, height=10)
+        self.transitions_text.pack(fill=tk.BOTH, padx=5, pady=2)
+        self.transitions_text.insert("1.0", "q0,a,Z→q0,AZ\nq0,a,A→q0,AA\nq0,b,A→q1,ε\nq1,b,A→q1,ε\nq1,ε,Z→q2,Z")
+        
+        # Input String section
+        input_frame = ttk.LabelFrame(left_panel, text="Input String")
+        input_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(input_frame, text="Input String:").pack(anchor=tk.W, padx=5, pady=2)
+        self.input_string_entry = ttk.Entry(input_frame)
+        self.input_string_entry.pack(fill=tk.X, padx=5, pady=2)
+        self.input_string_entry.insert(0, "aabb")
+        
+        # Controls section
+        controls_frame = ttk.LabelFrame(left_panel, text="Controls")
+        controls_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        button_frame = ttk.Frame(controls_frame)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.load_button = ttk.Button(button_frame, text="Load PDA", command=self.load_pda)
+        self.load_button.pack(side=tk.LEFT, padx=5)
+        
+        self.json_button = ttk.Button(button_frame, text="Load JSON", command=self.load_from_json)
+        self.json_button.pack(side=tk.LEFT, padx=5)
+        
+        self.save_json_button = ttk.Button(button_frame, text="Save JSON", command=self.save_to_json)
+        self.save_json_button.pack(side=tk.LEFT, padx=5)
+        
+        self.run_button = ttk.Button(button_frame, text="Run", command=self.run_simulation)
+        self.run_button.pack(side=tk.LEFT, padx=5)
+        
+        self.pause_button = ttk.Button(button_frame, text="Pause", command=self.pause_simulation)
+        self.pause_button.pack(side=tk.LEFT, padx=5)
+        self.pause_button.config(state=tk.DISABLED)
+        
+        self.step_back_button = ttk.Button(button_frame, text="Step Back", command=self.step_back)
+        self.step_back_button.pack(side=tk.LEFT, padx=5)
+        
+        self.step_button = ttk.Button(button_frame, text="Step", command=self.step_simulation)
+        self.step_button.pack(side=tk.LEFT, padx=5)
+        
+        self.reset_button = ttk.Button(button_frame, text="Reset", command=self.reset_visualization)
+        self.reset_button.pack(side=tk.LEFT, padx=5)
+        
+        speed_frame = ttk.Frame(controls_frame)
+        speed_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(speed_frame, text="Animation Speed:").pack(side=tk.LEFT, padx=5)
+        self.speed_scale = ttk.Scale(speed_frame, from_=0.0, to=2.0, orient=tk.HORIZONTAL, 
+                                    command=self.update_speed)
+        self.speed_scale.set(1.0)
+        self.speed_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        self.max_speed_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(speed_frame, text="Max speed", variable=self.max_speed_var).pack(side=tk.LEFT, padx=5)
+        
+        seek_frame = ttk.Frame(controls_frame)
+        seek_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(seek_frame, text="Seek:").pack(side=tk.LEFT, padx=5)
+        self.seek_scale = ttk.Scale(seek_frame, from_=0, to=0, orient=tk.HORIZONTAL,
+                                    command=self.seek)
+        self.seek_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.seek_label = ttk.Label(seek_frame, text="0 / 0", width=14)
+        self.seek_label.pack(side=tk.LEFT, padx=5)
+        
+        search_frame = ttk.Frame(controls_frame)
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(search_frame, text="Shortest path by:").pack(side=tk.LEFT, padx=5)
+        self.search_metric = tk.StringVar(value=SEARCH_METRICS[0])
+        ttk.Combobox(search_frame, textvariable=self.search_metric, values=SEARCH_METRICS,
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=5)
+        self.search_button = ttk.Button(search_frame, text="Find & Replay", command=self.find_shortest_path)
+        self.search_button.pack(side=tk.LEFT, padx=5)
+        
+        history_frame = ttk.Frame(controls_frame)
+        history_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(history_frame, text="History:").pack(side=tk.LEFT, padx=5)
+        self.history_policy = tk.StringVar(value="all")
+        history_combo = ttk.Combobox(history_frame, textvariable=self.history_policy,
+                                     values=HISTORY_POLICIES, state="readonly", width=10)
+        history_combo.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(history_frame, text="Keep last:").pack(side=tk.LEFT, padx=5)
+        self.history_limit = tk.IntVar(value=100)
+        ttk.Spinbox(history_frame, from_=1, to=100000, textvariable=self.history_limit,
+                    width=7).pack(side=tk.LEFT, padx=5)
+        ttk.Label(history_frame, text="steps").pack(side=tk.LEFT)
+        
+        profile_frame = ttk.Frame(controls_frame)
+        profile_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        # Profiling is off by default; toggling it starts a fresh run so the profile covers all of it
+        self.profile_runs = tk.BooleanVar(value=False)
+        ttk.Checkbutton(profile_frame, text="Profile runs (heat on transitions)", variable=self.profile_runs,
+                        command=self.reset_visualization).pack(side=tk.LEFT, padx=5)
+        self.export_profile_button = ttk.Button(profile_frame, text="Export Profile", command=self.export_profile)
+        self.export_profile_button.pack(side=tk.LEFT, padx=5)
+        
+        # Status information
+        status_frame = ttk.LabelFrame(left_panel, text="Status")
+        status_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.status_text = tk.Text(status_frame, height=5, width=40, wrap=tk.WORD)
+        self.status_text.pack(fill=tk.BOTH, padx=5, pady=5)
+        self.status_text.config(state=tk.DISABLED)
+        
+        # Right panel for visualization
+        right_panel = ttk.Frame(main_frame)
+        right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Canvas for stack visualization
+        visualization_frame = ttk.LabelFrame(right_panel, text="Stack Visualization")
+        visualization_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # The scrollbar moves through stack depths; only the cells in view are drawn
+        self.stack_scrollbar = ttk.Scrollbar(visualization_frame, orient=tk.VERTICAL, command=self.scroll_stack)
+        self.stack_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
+        
+        self.canvas = tk.Canvas(visualization_frame, bg="white")
+        self.canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(sequence, self.wheel_stack)
+        self.canvas.bind("<Configure>", lambda event: self.refresh_stack())
+        
+        # Traces frame showing multiple execution paths
+        traces_frame = ttk.LabelFrame(right_panel, text="Execution Traces")
+        traces_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        traces_toolbar = ttk.Frame(traces_frame)
+        traces_toolbar.pack(fill=tk.X, padx=5)
+        
+        ttk.Label(traces_toolbar, text="Sort:").pack(side=tk.LEFT, padx=5)
+        self.trace_order = tk.StringVar(value=TRACE_ORDERS[0])
+        order_combo = ttk.Combobox(traces_toolbar, textvariable=self.trace_order, values=TRACE_ORDERS,
+                                   state="readonly", width=15)
+        order_combo.pack(side=tk.LEFT, padx=5)
+        order_combo.bind("<<ComboboxSelected>>", lambda event: self.refresh_traces())
+        
+        self.group_traces = tk.BooleanVar(value=False)
+        ttk.Checkbutton(traces_toolbar, text="Group identical", variable=self.group_traces,
+                        command=self.refresh_traces).pack(side=tk.LEFT, padx=5)
+        
+        self.traces_count_label = ttk.Label(traces_toolbar, text="")
+        self.traces_count_label.pack(side=tk.RIGHT, padx=5)
+        
+        self.traces_canvas = tk.Canvas(traces_frame, bg="white", height=150)
+        self.traces_canvas.pack(fill=tk.X, padx=5, pady=(5, 0))
+        
+        # The scrollbar moves through entries; only the boxes in view exist on the canvas
+        self.traces_scrollbar = ttk.Scrollbar(traces_frame, orient=tk.HORIZONTAL, command=self.scroll_traces)
+        self.traces_scrollbar.pack(fill=tk.X, padx=5, pady=(0, 5))
+        for sequence in ("<MouseWheel>", "<Shift-MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.traces_canvas.bind(sequence, self.wheel_traces)
+        self.traces_canvas.bind("<Configure>", lambda event: self.refresh_traces())
+
+    def load_from_json(self, file_path=None):
+        """Load PDA configuration from a JSON file, asking for one if no path is given.
+
+        A grammar file (.cfg or .grammar) is simplified and compiled to a
+        top-down PDA, which then loads like any machine file.
+        """
+        try:
+            if file_path is None:
+                file_path = filedialog.askopenfilename(
+                    title="Select JSON Configuration File",
+                    filetypes=[("JSON files", "*.json"),
+                               ("Grammar files", " ".join("*" + suffix for suffix in GRAMMAR_SUFFIXES)),
+                               ("All files", "*.*")]
+                )
+            
+            if not file_path:
+                return  # User cancelled the operation
+                
+            if file_path.lower().endswith(GRAMMAR_SUFFIXES):
+                config = grammar_to_dict(simplify(load_grammar(file_path)))
+            else:
+                with open(file_path, 'r') as file:
+                    config = json.load(file)
+            
+            # Validate stack symbols in transitions before loading
+            stack_symbols = set(config.get("stack_symbols", []))
+            original_stack_symbol_count = len(stack_symbols)
+            transitions = config.get("transitions", [])
+            
+            # Check if all push symbols are in the stack symbols set
+            added_symbols = set()
+            for transition in transitions:
+                stack_push = transition.get("stack_push", "")
+                
+                # Normalize epsilon
+                if stack_push in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+                    transition["stack_push"] = EPSILON
+                    stack_push = EPSILON
+                    
+                # A push is a string or, for multi-character symbols, a list of symbols
+                if stack_push and stack_push != EPSILON:
+                    for symbol in tokenize_push(stack_push, stack_symbols):
+                        if symbol not in stack_symbols:
+                            # Add the missing symbol to the stack symbols
+                            stack_symbols.add(symbol)
+                            added_symbols.add(symbol)
+                            
+                # Also normalize input_symbol
+                input_symbol = transition.get("input_symbol", "")
+                if input_symbol in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+                    transition["input_symbol"] = EPSILON
+            
+            # Update the config with any added stack symbols
+            config["stack_symbols"] = list(stack_symbols)
+                
+            # Populate UI fields with the loaded configuration
+            self.states_entry.delete(0, tk.END)
+            self.states_entry.insert(0, ", ".join(config.get("states", [])))
+            
+            self.alphabet_entry.delete(0, tk.END)
+            self.alphabet_entry.insert(0, ", ".join(config.get("alphabet", [])))
+            
+            self.stack_symbols_entry.delete(0, tk.END)
+            self.stack_symbols_entry.insert(0, ", ".join(config.get("stack_symbols", [])))
+            
+            self.initial_state_entry.delete(0, tk.END)
+            self.initial_state_entry.insert(0, config.get("initial_state", ""))
+            
+            self.initial_stack_symbol_entry.delete(0, tk.END)
+            self.initial_stack_symbol_entry.insert(0, config.get("initial_stack_symbol", ""))
+            
+            self.accept_states_entry.delete(0, tk.END)
+            self.accept_states_entry.insert(0, ", ".join(config.get("accept_states", [])))
+            
+            # Handle transitions
+            self.transitions_text.delete("1.0", tk.END)
+            transition_lines = []
+            
+            for transition in transitions:
+                from_state = transition.get("from_state", "")
+                input_symbol = transition.get("input_symbol", "")
+                stack_symbol = transition.get("stack_symbol", "")
+                to_state = transition.get("to_state", "")
+                stack_push = transition.get("stack_push", "")
+                
+                # Normalize epsilon for display
+                if input_symbol in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+                    input_symbol = EPSILON
+                if not isinstance(stack_push, str):
+                    stack_push = " ".join(stack_push)  # Explicit symbol list
+                if stack_push in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+                    stack_push = EPSILON
+                
+                transition_line = f"{from_state},{input_symbol},{stack_symbol}→{to_state},{stack_push}"
+                transition_lines.append(transition_line)
+            
+            self.transitions_text.insert("1.0", "\n".join(transition_lines))
+            
+            # Set input string if provided
+            if "input_string" in config:
+                self.input_string_entry.delete(0, tk.END)
+                self.input_string_entry.insert(0, config.get("input_string", ""))
+            
+            # If any symbols were added, inform the user
+            if added_symbols:
+                self.update_status(f"PDA configuration loaded from {file_path}\nAdded missing stack symbols: {', '.join(added_symbols)}")
+            else:
+                self.update_status(f"PDA configuration loaded from {file_path}")
+            
+            # Automatically load the PDA
+            self.load_pda()
+            
+        except Exception as e:
+            messagebox.showerror("Error Loading JSON", str(e))
+            self.update_status(f"Error loading JSON: {str(e)}")
+    
+    def save_to_json(self):
+        """Save current PDA configuration to a JSON file"""
+        try:
+            # First ensure the PDA is correctly loaded from UI to capture any changes
+            self.load_pda()
+            
+            # Create the configuration dictionary
+            config = {
+                "states": list(self.pda.states),
+                "alphabet": [s for s in self.pda.alphabet if s != 'ε'],  # Exclude epsilon from alphabet
+                "stack_symbols": list(self.pda.stack_symbols),
+                "initial_state": self.pda.initial_state,
+                "initial_stack_symbol": self.pda.initial_stack_symbol,
+                "accept_states": list(self.pda.accept_states),
+                "input_string": self.input_string_entry.get(),
+                "transitions": []
+            }
+            
+            # Format transitions; pushes are written as lists once any
+            # stack symbol is longer than one character
+            symbol_lists = any(len(symbol) > 1 for symbol in self.pda.stack_symbols)
+            for key, transitions in self.pda.transitions.items():
+                state, input_symbol, stack_symbol = key
+                
+                for next_state, stack_push in transitions:
+                    transition = {
+                        "from_state": state,
+                        "input_symbol": input_symbol,
+                        "stack_symbol": stack_symbol,
+                        "to_state": next_state,
+                        "stack_push": (list(stack_push) or EPSILON) if symbol_lists else self.pda.push_text(stack_push)
+                    }
+                    config["transitions"].append(transition)
+            
+            # Ask user for save location
+            file_path = filedialog.asksaveasfilename(
+                title="Save JSON Configuration",
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            )
+            
+            if not file_path:
+                return  # User cancelled the operation
+            
+            with open(file_path, 'w') as file:
+                json.dump(config, file, indent=4)
+            
+            self.update_status(f"PDA configuration saved to {file_path}")
+            
+        except Exception as e:
+            messagebox.showerror("Error Saving JSON", str(e))
+            self.update_status(f"Error saving JSON: {str(e)}")
+    
+    def load_pda(self):
+        """Parse and load PDA definition from UI entries"""
+        try:
+            self.pda = PDA()
+            
+            # Parse states
+            self.pda.states = {s.strip() for s in self.states_entry.get().split(',')}
+            
+            # Parse alphabet
+            self.pda.alphabet = {s.strip() for s in self.alphabet_entry.get().split(',')}
+            self.pda.alphabet.add(EPSILON)  # Add epsilon for epsilon transitions
+            
+            # Parse stack symbols
+            self.pda.stack_symbols = {s.strip() for s in self.stack_symbols_entry.get().split(',')}
+            
+            # Set initial state
+            self.pda.initial_state = self.initial_state_entry.get().strip()
+            if self.pda.initial_state not in self.pda.states:
+                raise ValueError(f"Initial state '{self.pda.initial_state}' not in state set")
+            
+            # Set initial stack symbol
+            self.pda.initial_stack_symbol = self.initial_stack_symbol_entry.get().strip()
+            if self.pda.initial_stack_symbol not in self.pda.stack_symbols:
+                raise ValueError(f"Initial stack symbol '{self.pda.initial_stack_symbol}' not in stack symbol set")
+            
+            # Parse accept states
+            self.pda.accept_states = {s.strip() for s in self.accept_states_entry.get().split(',')}
+            for state in self.pda.accept_states:
+                if state not in self.pda.states:
+                    raise ValueError(f"Accept state '{state}' not in state set")
+            
+            # Pre-validate transitions for missing stack symbols
+            transition_text = self.transitions_text.get("1.0", tk.END).strip()
+            missing_stack_symbols = set()
+            
+            for line in transition_text.split('\n'):
+                if not line.strip():
+                    continue
+                
+                # Expected format: "q0,a,Z→q0,AZ"
+                match = re.match(r'([^,]+),([^,]+),([^→]+)→([^,]+),(.*)', line)
+                if match:
+                    _, input_symbol, _, _, stack_push = match.groups()
+                    input_symbol = input_symbol.strip()
+                    stack_push = stack_push.strip()
+                    
+                    # Normalize epsilon
+                    if input_symbol in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+                        input_symbol = EPSILON
+                    
+                    if stack_push in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+                        stack_push = EPSILON
+                    
+                    if stack_push and stack_push != EPSILON:
+                        for symbol in tokenize_push(stack_push, self.pda.stack_symbols):
+                            if symbol not in self.pda.stack_symbols:
+                                missing_stack_symbols.add(symbol)
+            
+            # If there are missing stack symbols, ask the user if they want to add them
+            if missing_stack_symbols:
+                msg = f"The following stack symbols are used in transitions but not defined: {', '.join(missing_stack_symbols)}\n\nDo you want to add them to your stack symbols?"
+                add_symbols = messagebox.askyesno("Missing Stack Symbols", msg)
+                
+                if add_symbols:
+                    # Add the missing symbols to the stack symbols
+                    self.pda.stack_symbols.update(missing_stack_symbols)
+                    
+                    # Update the stack symbols entry
+                    self.stack_symbols_entry.delete(0, tk.END)
+                    self.stack_symbols_entry.insert(0, ", ".join(self.pda.stack_symbols))
+                    
+                    self.update_status(f"Added missing stack symbols: {', '.join(missing_stack_symbols)}")
+            
+            # Now parse transitions
+            for line in transition_text.split('\n'):
+                if not line.strip():
+                    continue
+                
+                # Expected format: "q0,a,Z→q0,AZ"
+                match = re.match(r'([^,]+),([^,]+),([^→]+)→([^,]+),(.*)', line)
+                if not match:
+                    raise ValueError(f"Invalid transition format: {line}")
+                
+                state, input_symbol, stack_symbol, next_state, stack_push = match.groups()
+                state = state.strip()
+                input_symbol = input_symbol.strip()
+                stack_symbol = stack_symbol.strip()
+                next_state = next_state.strip()
+                stack_push = stack_push.strip()
+                
+                # Normalize epsilon
+                if input_symbol in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+                    input_symbol = EPSILON
+                
+                if stack_push in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+                    stack_push = EPSILON
+                
+                if state not in self.pda.states:
+                    raise ValueError(f"State '{state}' in transition not in state set")
+                if next_state not in self.pda.states:
+                    raise ValueError(f"Next state '{next_state}' in transition not in state set")
+                if input_symbol != EPSILON and input_symbol not in self.pda.alphabet:
+                    raise ValueError(f"Input symbol '{input_symbol}' in transition not in alphabet")
+                if stack_symbol not in self.pda.stack_symbols:
+                    raise ValueError(f"Stack symbol '{stack_symbol}' in transition not in stack symbol set")
+                
+                # Check stack push symbols; several characters may make one symbol
+                stack_push = tokenize_push(stack_push, self.pda.stack_symbols)
+                if stack_push:  # ε means pop only
+                    for symbol in stack_push:
+                        if symbol not in self.pda.stack_symbols:
+                            invalid_symbol = symbol
+                            raise ValueError(f"Push symbol '{invalid_symbol}' in transition not in stack symbol set. Please add '{invalid_symbol}' to your stack symbols list.")
+                
+                self.pda.add_transition(state, input_symbol, stack_symbol, next_state, stack_push)
+            
+            # Build the epsilon analysis and integer transition table once, up front
+            self.pda.compile()
+            
+            self.update_status("PDA loaded successfully!")
+            self.reset_visualization()
+            
+            message = "PDA loaded successfully!"
+            if self.pda.compiled.deterministic:
+                message += "\nDeterministic PDA: headless runs use the single-configuration fast path"
+            if self.pda.epsilon_cycles:
+                growing = sum(1 for _, is_growing in self.pda.epsilon_cycles if is_growing)
+                message += f"\n{len(self.pda.epsilon_cycles)} ε-cycle(s) found"
+                if growing:
+                    message += f", {growing} growing the stack (search depth is bounded)"
+            unreachable = self.pda.states - self.pda.reachable_states
+            if unreachable:
+                message += f"\nUnreachable state(s): {', '.join(sorted(unreachable))}"
+            dead = self.pda.states - self.pda.live_states
+            if dead:
+                message += f"\nState(s) that cannot reach an accept state: {', '.join(sorted(dead))} (branches entering them are pruned)"
+            self.update_status(message)
+            
+        except Exception as e:
+            messagebox.showerror("Error Loading PDA", str(e))
+            self.update_status(f"Error: {str(e)}")
+    
+    def reset_visualization(self):
+        """Reset the visualization to initial state"""
+        self.stop_run()
+        self.snapshots = None
+        self.search_results = None
+        self.clear_canvases()
+        self.trace_offset = 0
+        self.stack_offset = 0
+        self.stack_cursor = (None, 0, None)
+        self.runs_cache.clear()
+        self.simulation = None
+        self.current_configs = []
+        if self.history is not None:
+            self.history.close()
+        self.history = None
+        self.current_step = 0
+        
+        self.run_button.config(state=tk.NORMAL)
+        self.pause_button.config(state=tk.DISABLED)
+        self.step_button.config(state=tk.NORMAL)
+        self.step_back_button.config(state=tk.NORMAL)
+        self.search_button.config(state=tk.NORMAL)
+        
+        # Initialize with the start configuration if PDA is loaded
+        if hasattr(self.pda, 'initial_state') and self.pda.initial_state:
+            input_string = self.input_string_entry.get()
+            simulation_class = ProfiledSimulation if self.profile_runs.get() else Simulation
+            self.simulation = simulation_class(self.pda, input_string)
+            self.current_configs = self.simulation.configs
+            self.history = self.create_history()
+            self.history.record(self.simulation)
+            self.draw_stack(self.current_configs[0])
+            message = f"Ready to execute input: {input_string}"
+            known = self.run_results.lookup(self.pda, input_string)
+            if known is not None:
+                message += f"\nAn earlier run of this machine {'accepted' if known else 'rejected'} this input."
+            self.update_status(message)
+        self.update_seek()
+        self.show_heat()
+    
+    def find_shortest_path(self):
+        """Search for the shortest accepting path, then set it up for replay"""
+        self.reset_visualization()
+        if self.simulation is None:
+            messagebox.showinfo("Error", "Please load a PDA configuration first")
+            return
+        
+        pda = self.pda
+        input_string = self.simulation.input_string
+        metric = self.search_metric.get()
+        results = self.search_results = queue.Queue()
+        cancel = self.search_cancel = threading.Event()
+        
+        def search():
+            try:
+                results.put(shortest_witness(pda, input_string, metric, SEARCH_LIMIT, cancel))
+            except Exception as e:
+                results.put(e)
+        
+        # Searched in a separate thread like a run, so the window stays responsive;
+        # nothing may step the simulation the search result will replace
+        self.run_button.config(state=tk.DISABLED)
+        self.step_button.config(state=tk.DISABLED)
+        self.step_back_button.config(state=tk.DISABLED)
+        self.search_button.config(state=tk.DISABLED)
+        threading.Thread(target=search, daemon=True).start()
+        self.update_status(f"Searching for the shortest accepting path ({metric})...")
+        self.after(1000 // FRAME_RATE, self.finish_search, results, pda, input_string)
+    
+    def finish_search(self, results, pda, input_string):
+        """Replace the simulation with a replay of the path found, once the search is done"""
+        if results is not self.search_results or pda is not self.pda:
+            return  # Reset or another machine loaded while searching; the search was cancelled
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            self.after(1000 // FRAME_RATE, self.finish_search, results, pda, input_string)
+            return
+        self.search_results = None
+        self.run_button.config(state=tk.NORMAL)
+        self.step_button.config(state=tk.NORMAL)
+        self.step_back_button.config(state=tk.NORMAL)
+        self.search_button.config(state=tk.NORMAL)
+        
+        if isinstance(result, Exception):
+            self.update_status(f"Error in search: {str(result)}")
+            return
+        if not result.finished:
+            self.update_status(f"Search stopped after {result.explored} configuration(s) "
+                               f"without finding an accepting path for {input_string!r}.")
+            return
+        if not result.accepted:
+            self.update_status(f"No accepting path for {input_string!r} "
+                               f"({result.explored} configuration(s) explored). String rejected.")
+            return
+        
+        # Replay only the witness path through the usual step, run and seek controls.
+        # A run still recording into the old history must stop before it is closed
+        self.stop_run()
+        self.snapshots = None
+        self.simulation = PathReplay(self.pda, input_string, result.path())
+        self.history.close()
+        self.history = self.create_history()
+        self.history.record(self.simulation)
+        self.show_step(0)
+        self.update_status(f"Shortest accepting path: {result.moves} move(s), {result.epsilon_moves} ε-move(s), "
+                           f"{result.explored} configuration(s) explored.\nStep or Run to replay it.")
+    
+    def create_history(self):
+        """Create a trace history from the policy chosen in the controls"""
+        try:
+            limit = self.history_limit.get()
+        except tk.TclError:
+            limit = 100
+        return TraceHistory(self.history_policy.get(), limit)
+    
+    def update_seek(self, available=None):
+        """Match the seek slider to the recorded steps and the step on screen"""
+        if available is None:
+            available = self.history.available() if self.history is not None else range(0)
+        last = available.stop - 1 if available else 0
+        self.seek_scale.config(from_=available.start if available else 0, to=last)
+        self.seek_scale.set(self.current_step)
+        self.seek_label.config(text=f"{self.current_step} / {last}")
+    
+    def update_speed(self, value):
+        """Update animation speed based on slider"""
+        self.animation_speed = float(value)
+    
+    def update_status(self, message):
+        """Update the status text area"""
+        self.status_text.config(state=tk.NORMAL)
+        self.status_text.delete("1.0", tk.END)
+        self.status_text.insert("1.0", message)
+        self.status_text.config(state=tk.DISABLED)
+    
+    def run_simulation(self):
+        """Run the simulation from the current point to completion"""
+        if not self.current_configs:
+            self.reset_visualization()
+            if not self.current_configs:
+                messagebox.showinfo("Error", "Please load a PDA configuration first")
+                return
+        
+        self.stop_run()
+        self.is_running = True
+        self.max_speed = self.max_speed_var.get()
+        self.stop_event.clear()
+        self.run_button.config(state=tk.DISABLED)
+        self.pause_button.config(state=tk.NORMAL)
+        self.step_button.config(state=tk.DISABLED)
+        self.step_back_button.config(state=tk.DISABLED)
+        
+        # Steps are computed in a separate thread to not block the UI; that
+        # thread never touches Tk and hands snapshots back through a queue
+        snapshots = self.snapshots = queue.Queue()
+        self.execution_thread = threading.Thread(target=self.run_simulation_thread,
+                                                 args=(self.simulation, self.history, self.current_step, snapshots))
+        self.execution_thread.daemon = True
+        self.execution_thread.start()
+        self.after(1000 // FRAME_RATE, self.drain_snapshots, snapshots)
+    
+    def run_simulation_thread(self, simulation, history, step, snapshots):
+        """Thread for running the simulation; it reports through snapshots only"""
+        try:
+            configs = history.frontier(step)
+            while self.is_running and configs:
+                if step < history.last_step:
+                    # Rewound: move forward through the recorded steps first
+                    step += 1
+                elif simulation.is_finished():
+                    break
+                else:
+                    simulation.step()
+                    history.record(simulation)
+                    step = simulation.steps
+                configs = history.frontier(step)
+                
+                if not self.max_speed:
+                    snapshots.put(self.take_snapshot(simulation, history, step, configs))
+                    self.stop_event.wait(self.animation_speed)
+            
+            snapshots.put(self.take_snapshot(simulation, history, step, configs))
+        except Exception as e:
+            snapshots.put(e)
+        snapshots.put(None)
+    
+    def take_snapshot(self, simulation, history, step, configs):
+        """Capture what show_snapshot needs, so drawing never reads live state"""
+        return Snapshot(step, configs, history.last_step, simulation.duplicates, simulation.doomed,
+                        history.available())
+    
+    def drain_snapshots(self, snapshots):
+        """Draw the newest snapshot from the run thread, then check again next frame"""
+        if snapshots is not self.snapshots:
+            return  # The run was reset or replaced
+        latest = None
+        finished = False
+        error = None
+        while True:
+            try:
+                item = snapshots.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                finished = True
+            elif isinstance(item, Exception):
+                error = item
+            else:
+                latest = item
+        
+        if latest is not None:
+            self.show_snapshot(latest)
+        if finished:
+            self.finish_run(error)
+        else:
+            self.after(1000 // FRAME_RATE, self.drain_snapshots, snapshots)
+    
+    def finish_run(self, error=None):
+        """Report the outcome once the run thread has stopped"""
+        if error is not None:
+            self.update_status(f"Error in simulation: {str(error)}")
+        elif self.simulation.accepted:
+            self.update_status("String accepted! In an accept state.")
+        elif not self.current_configs:
+            self.update_status("No valid configurations remain. String rejected.")
+        else:
+            self.update_status("String processed but not accepted. Not in an accept state.")
+        if error is None and (self.simulation.accepted or self.simulation.is_finished()):
+            self.run_results.store(self.pda, self.simulation.input_string, self.simulation.accepted)
+        self.show_heat()
+        
+        self.is_running = False
+        self.execution_thread = None
+        self.pause_button.config(state=tk.DISABLED)
+        self.run_button.config(state=tk.NORMAL)
+        self.step_button.config(state=tk.NORMAL)
+        self.step_back_button.config(state=tk.NORMAL)
+    
+    def stop_run(self):
+        """Stop the run thread and wait for it, so its simulation can be replaced"""
+        self.is_running = False
+        self.stop_event.set()
+        self.search_cancel.set()
+        if self.execution_thread is not None:
+            self.execution_thread.join()
+            self.execution_thread = None
+    
+    def pause_simulation(self):
+        """Pause the running simulation"""
+        self.stop_run()
+        self.show_heat()
+        self.pause_button.config(state=tk.DISABLED)
+        self.run_button.config(state=tk.NORMAL)
+        self.step_button.config(state=tk.NORMAL)
+        self.step_back_button.config(state=tk.NORMAL)
+    
+    def step_simulation(self):
+        """Advance the simulation by one step"""
+        if not self.current_configs:
+            self.reset_visualization()
+            if not self.current_configs:
+                messagebox.showinfo("Error", "Please load a PDA configuration first")
+                return
+        
+        if self.current_step < self.history.last_step:
+            # Rewound: move forward through the recorded steps first
+            self.show_step(self.current_step + 1)
+            return
+        
+        # Expand every active configuration by one move
+        self.simulation.step()
+        self.history.record(self.simulation)
+        self.show_step(self.simulation.steps)
+        self.show_heat()
+    
+    def step_back(self):
+        """Show the step before the one on screen"""
+        if self.history is None or self.current_step - 1 not in self.history.available():
+            self.update_status(f"Step {self.current_step}: no earlier step is kept by the history policy.")
+            return
+        self.show_step(self.current_step - 1)
+    
+    def seek(self, value):
+        """Jump to the step picked on the seek slider"""
+        step = int(float(value))
+        if self.history is None or step == self.current_step or self.is_running:
+            return
+        available = self.history.available()
+        if available:
+            self.show_step(min(max(step, available.start), available.stop - 1))
+    
+    def show_step(self, step):
+        """Display the frontier recorded for a step"""
+        self.show_snapshot(self.take_snapshot(self.simulation, self.history, step, self.history.frontier(step)))
+    
+    def show_snapshot(self, snapshot):
+        """Display one step"""
+        self.current_configs = snapshot.configs
+        self.current_step = snapshot.step
+        self.update_seek(snapshot.available)
+        
+        # Visualize all currently active configs
+        if self.current_configs:
+            # Show the first configuration's stack in detail
+            self.draw_stack(self.current_configs[0])
+            
+            # Draw all traces in the traces canvas
+            self.draw_traces()
+            
+            # Update status with number of active configurations
+            status_message = f"Step {self.current_step}: {len(self.current_configs)} active configuration(s)"
+            if self.current_step < snapshot.last_step:
+                status_message += f" (rewound from step {snapshot.last_step})"
+            if snapshot.duplicates:
+                status_message += f" ({snapshot.duplicates} duplicate branch(es) merged)"
+            if snapshot.doomed:
+                status_message += f" ({snapshot.doomed} doomed branch(es) pruned)"
+            
+            if len(self.current_configs) > 0:
+                config = self.current_configs[0]
+                status_message += f"\nCurrent State: {self.simulation.state_name(config)}"
+                status_message += f"\nRemaining Input: {self.input_preview(config)}"
+                status_message += f"\nStack: {self.simulation.runs_text(self.stack_runs(config)) or 'empty'}"
+                
+                if config.transition_taken:
+                    status_message += f"\nTransition: {config.transition_taken}"
+            
+            self.update_status(status_message)
+        else:
+            self.hide_items(self.canvas, self.stack_items, ())
+            self.hide_items(self.traces_canvas, self.trace_items, ())
+            self.update_status(f"Step {self.current_step}: No valid configurations remain. String rejected.")
+    
+    def transition_name(self, line):
+        """The trace text of a line in the transitions box, or None if it does not parse"""
+        match = re.match(r'([^,]+),([^,]+),([^→]+)→([^,]+),(.*)', line)
+        if not match:
+            return None
+        state, input_symbol, stack_symbol, next_state, stack_push = (part.strip() for part in match.groups())
+        if input_symbol in ('ε', 'Îµ', 'Ïµ', 'ϵ', 'Îµ', ''):
+            input_symbol = EPSILON
+        return self.pda.transition_text(state, input_symbol, stack_symbol, next_state,
+                                        tokenize_push(stack_push, self.pda.stack_symbols))
+    
+    def show_heat(self):
+        """Shade the transitions box by how often each line has fired in a profiled run"""
+        text = self.transitions_text
+        for tag in text.tag_names():
+            if tag.startswith("heat"):
+                text.tag_delete(tag)
+        profile = getattr(self.simulation, "profile", None)
+        if profile is None or not profile.transition_hits:
+            return
+        
+        peak = max(profile.transition_hits.values())
+        for number, line in enumerate(text.get("1.0", tk.END).split("\n"), 1):
+            hits = profile.transition_hits.get(self.transition_name(line), 0)
+            if not hits:
+                continue
+            level = hits / peak
+            colour = "#%02x%02x%02x" % tuple(round(cool + (hot - cool) * level)
+                                             for cool, hot in zip(HEAT_COOL, HEAT_HOT))
+            tag = f"heat{number}"
+            text.tag_add(tag, f"{number}.0", f"{number}.end")
+            text.tag_config(tag, background=colour)
+    
+    def export_profile(self):
+        """Save the profile of the current run as JSON, or its per-step rows as CSV"""
+        profile = getattr(self.simulation, "profile", None)
+        if profile is None:
+            messagebox.showinfo("Export Profile", "Tick \"Profile runs\" and run the simulation first")
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="Export Profile",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("CSV files (per step)", "*.csv"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            if file_path.lower().endswith(".csv"):
+                profile.write_csv(file_path)
+            else:
+                profile.write_json(file_path)
+        except OSError as e:
+            messagebox.showerror("Export Profile", str(e))
+            return
+        summary = profile.summary()
+        self.update_status(f"Profile saved to {file_path}\n{summary['moves']} move(s), "
+                           f"{summary['epsilon_ratio']:.0%} ε, peak frontier {summary['peak_frontier']}, "
+                           f"peak stack {summary['peak_stack']}")
+    
+    def clear_canvases(self):
+        """Delete every canvas item, including the ones kept between steps"""
+        self.canvas.delete("all")
+        self.traces_canvas.delete("all")
+        self.stack_items.clear()
+        self.trace_items.clear()
+    
+    def update_item(self, canvas, items, key, kind, coords, **options):
+        """Create a canvas item the first time, afterwards change only what differs"""
+        item = items.get(key)
+        if item is None:
+            item_id = getattr(canvas, "create_" + kind)(*coords, **options)
+            items[key] = [item_id, coords, options]
+            return
+        
+        item_id, old_coords, old_options = item
+        if coords != old_coords:
+            canvas.coords(item_id, *coords)
+            item[1] = coords
+        changed = {name: value for name, value in options.items() if old_options.get(name) != value}
+        if changed:
+            canvas.itemconfigure(item_id, **changed)
+            old_options.update(changed)
+    
+    def hide_items(self, canvas, items, drawn):
+        """Hide the kept items that were not drawn this time"""
+        for key, (item_id, _, options) in items.items():
+            if key not in drawn and options.get("state") != tk.HIDDEN:
+                canvas.itemconfigure(item_id, state=tk.HIDDEN)
+                options["state"] = tk.HIDDEN
+    
+    def stack_runs(self, config):
+        """Run-length summary of a configuration's stack.
+        
+        Derived from the closest ancestor whose summary is cached, one move at
+        a time, so a deep stack is only scanned in full when no ancestor is
+        known (the first step shown, or after the history cut parent links).
+        """
+        cached = self.runs_cache.get(id(config.stack))
+        if cached is not None and cached[0] is config.stack:
+            self.runs_cache.move_to_end(id(config.stack))
+            return cached[1]
+        
+        chain = [config]  # config and its ancestors with unknown summaries, newest first
+        runs = None
+        while len(chain) <= RUNS_SEARCH_DEPTH:
+            # The run thread may cut this link at any moment, so read it once
+            known = chain[-1].parent
+            if known is None:
+                break
+            cached = self.runs_cache.get(id(known.stack))
+            if cached is not None and cached[0] is known.stack:
+                runs = cached[1]
+                break
+            chain.append(known)
+        
+        if runs is None:
+            known = chain.pop()
+            runs = StackRuns.from_stack(known.stack)
+        for child in reversed(chain):
+            if child.stack is not known.stack:
+                runs = runs.derive(known.stack, child.stack) or StackRuns.from_stack(child.stack)
+            known = child
+        
+        self.runs_cache[id(config.stack)] = (config.stack, runs)
+        if len(self.runs_cache) > RUNS_CACHE_SIZE:
+            self.runs_cache.popitem(last=False)
+        return runs
+    
+    def input_preview(self, config, limit=40):
+        """Unread input for display, cut short so long inputs are not copied"""
+        if config.input_left > limit:
+            return config.peek_input(limit) + "..."
+        return config.peek_input(limit) or EPSILON
+    
+    def stack_window(self, stack, depth, count):
+        """Symbol names of count cells from depth down, walking from the last position used"""
+        cursor_stack, cursor_depth, node = self.stack_cursor
+        if cursor_stack is not stack or cursor_depth > depth:
+            cursor_depth, node = 0, stack
+        node = node.drop(depth - cursor_depth)
+        self.stack_cursor = (stack, depth, node)
+        names = self.simulation.machine.symbol_names
+        return [names[symbol] for symbol in node.peek(count)]
+    
+    def stack_cells_in_view(self):
+        """Number of stack cells that fit on the stack canvas"""
+        canvas_height = self.canvas.winfo_height()
+        if canvas_height < 10:
+            canvas_height = 400
+        return max(1, (canvas_height - 30 - STACK_TOP_MARGIN) // STACK_CELL_HEIGHT)
+    
+    def scroll_stack(self, action, amount, unit=None):
+        """Scrollbar callback: change the depth of the first cell in view"""
+        if not self.current_configs:
+            return
+        depth = len(self.current_configs[0].stack)
+        if action == "moveto":
+            self.stack_offset = int(float(amount) * depth)
+        elif unit == "pages":
+            self.stack_offset += int(amount) * self.stack_cells_in_view()
+        else:
+            self.stack_offset += int(amount)
+        self.draw_stack(self.current_configs[0])
+    
+    def wheel_stack(self, event):
+        """Scroll the stack viewport with the mouse wheel"""
+        if event.num == 4 or event.delta > 0:
+            self.scroll_stack("scroll", -1, "units")
+        else:
+            self.scroll_stack("scroll", 1, "units")
+    
+    def refresh_stack(self):
+        """Redraw the stack after a resize"""
+        if self.current_configs:
+            self.draw_stack(self.current_configs[0])
+    
+    def draw_stack(self, config):
+        """Draw the stack for a single configuration"""
+        if not config or not hasattr(config, 'stack'):
+            return
+        
+        stack = config.stack
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        
+        # Ensure we have dimensions even on first run
+        if canvas_width < 10:
+            canvas_width = 300
+        if canvas_height < 10:
+            canvas_height = 400
+        
+        # Items are kept between steps; only the ones that differ are touched
+        drawn = set()
+        
+        def item(key, kind, coords, **options):
+            drawn.add(key)
+            self.update_item(self.canvas, self.stack_items, key, kind, coords, state=tk.NORMAL, **options)
+        
+        # Draw stack title and state info
+        item("title", "text", (canvas_width // 2, 20),
+             text=f"State: {self.simulation.state_name(config)} | Input: {self.input_preview(config)}",
+             font=("Arial", 12, "bold"))
+        
+        # Draw the stack
+        stack_width = 100
+        element_height = STACK_CELL_HEIGHT
+        
+        # Position the stack in the center of the canvas
+        stack_x = canvas_width // 2 - stack_width // 2
+        
+        # Draw bottom of stack
+        item("bottom", "rectangle", (stack_x, canvas_height - 30, stack_x + stack_width, canvas_height - 10),
+             fill="lightgray", outline="black")
+        
+        # Draw the cells in view, from the top of the stack down, without
+        # touching the rest of the stack
+        depth = len(stack)
+        in_view = self.stack_cells_in_view()
+        self.stack_offset = max(0, min(self.stack_offset, depth - in_view))
+        if stack:
+            visible = self.stack_window(stack, self.stack_offset, in_view)
+            max_visible = len(visible)
+            
+            for i in range(max_visible):
+                y_pos = canvas_height - 30 - (i + 1) * element_height
+                
+                item(("cell", i), "rectangle", (stack_x, y_pos, stack_x + stack_width, y_pos + element_height),
+                     fill="lightblue" if self.stack_offset + i == 0 else "white", outline="black")
+                item(("symbol", i), "text", (stack_x + stack_width // 2, y_pos + element_height // 2),
+                     text=visible[i], font=("Arial", 14, "bold"))
+            
+            # If there are more elements than we can show
+            if depth > max_visible:
+                first = self.stack_offset + 1
+                item("more", "text", (stack_x + stack_width // 2, canvas_height - 30 - (max_visible + 1) * element_height),
+                     text=f"cells {first}-{self.stack_offset + max_visible} of {depth}", font=("Arial", 10))
+            
+            # Run-length summary of the whole stack, top first
+            item("summary", "text", (canvas_width // 2, 70),
+                 text=f"Stack: {self.simulation.runs_text(self.stack_runs(config))}",
+                 font=("Arial", 10), width=canvas_width - 20)
+            self.stack_scrollbar.set(self.stack_offset / depth, (self.stack_offset + max_visible) / depth)
+        else:
+            self.stack_scrollbar.set(0, 1)
+            # Empty stack message
+            item("empty", "text", (stack_x + stack_width // 2, canvas_height - 60),
+                 text="Empty Stack", font=("Arial", 10, "italic"))
+            
+        # Draw state information
+        if config.transition_taken:
+            item("transition", "text", (canvas_width // 2, 45),
+                 text=f"Transition: {config.transition_taken}", font=("Arial", 10), fill="blue")
+            
+        # Draw accept/reject status
+        if not config.input_left:
+            accepted = self.simulation.is_accepting(config)
+            status_text = "ACCEPT" if accepted else "Not Accepted"
+            status_color = "green" if accepted else "red"
+            
+            item("status", "text", (canvas_width // 2, 95),
+                 text=status_text, font=("Arial", 12, "bold"), fill=status_color)
+        
+        self.hide_items(self.canvas, self.stack_items, drawn)
+    
+    def trace_entries(self):
+        """Return the (config, count) pairs to list in the traces panel, in order.
+        
+        With grouping on, configurations that would show the same box are
+        listed once with how many there are. The result is cached until
+        current_configs or the panel options change.
+        """
+        key = (self.trace_order.get(), self.group_traces.get())
+        if self.trace_entries_source is self.current_configs and self.trace_entries_key == key:
+            return self.trace_entries_cache
+        
+        order, group = key
+        if group:
+            groups = {}
+            for config in self.current_configs:
+                shown = (config.state, config.position, len(config.stack), tuple(config.stack.peek(3)))
+                entry = groups.get(shown)
+                groups[shown] = [config, 1] if entry is None else [entry[0], entry[1] + 1]
+            entries = [tuple(entry) for entry in groups.values()]
+        else:
+            entries = [(config, 1) for config in self.current_configs]
+        
+        if order == "deepest stack":
+            entries.sort(key=lambda entry: len(entry[0].stack), reverse=True)
+        elif order == "most input read":
+            entries.sort(key=lambda entry: entry[0].position, reverse=True)
+        
+        self.trace_entries_source = self.current_configs
+        self.trace_entries_key = key
+        self.trace_entries_cache = entries
+        return entries
+    
+    def refresh_traces(self):
+        """Redraw the traces panel after scrolling or a change of options"""
+        if self.current_configs:
+            self.draw_traces()
+    
+    def traces_in_view(self):
+        """Number of boxes that fit across the traces canvas"""
+        canvas_width = self.traces_canvas.winfo_width()
+        if canvas_width < 10:
+            canvas_width = 600
+        return max(1, (canvas_width - TRACE_SPACING) // (TRACE_WIDTH + TRACE_SPACING))
+    
+    def scroll_traces(self, action, amount, unit=None):
+        """Scrollbar callback: move the first entry in view"""
+        count = len(self.trace_entries()) if self.current_configs else 0
+        if action == "moveto":
+            self.trace_offset = int(float(amount) * count)
+        elif unit == "pages":
+            self.trace_offset += int(amount) * self.traces_in_view()
+        else:
+            self.trace_offset += int(amount)
+        self.draw_traces()
+    
+    def wheel_traces(self, event):
+        """Scroll the traces panel with the mouse wheel"""
+        if event.num == 4 or event.delta > 0:
+            self.scroll_traces("scroll", -1, "units")
+        else:
+            self.scroll_traces("scroll", 1, "units")
+    
+    def draw_traces(self):
+        """Draw the execution traces in view in the traces canvas"""
+        canvas_width = self.traces_canvas.winfo_width()
+        canvas_height = self.traces_canvas.winfo_height()
+        
+        # Ensure we have dimensions even on first run
+        if canvas_width < 10:
+            canvas_width = 600
+        if canvas_height < 10:
+            canvas_height = 150
+        
+        drawn = set()
+        
+        def item(key, kind, coords, **options):
+            drawn.add(key)
+            self.update_item(self.traces_canvas, self.trace_items, key, kind, coords, state=tk.NORMAL, **options)
+        
+        entries = self.trace_entries() if self.current_configs else []
+        count = len(entries)
+        if count == 0:
+            item("none", "text", (canvas_width // 2, canvas_height // 2),
+                 text="No active configurations", font=("Arial", 10, "italic"))
+            self.hide_items(self.traces_canvas, self.trace_items, drawn)
+            self.traces_scrollbar.set(0, 1)
+            self.traces_count_label.config(text="")
+            return
+        
+        # Only the entries in view get canvas items, keyed by slot so
+        # scrolling reuses them
+        in_view = self.traces_in_view()
+        self.trace_offset = max(0, min(self.trace_offset, count - in_view))
+        shown = entries[self.trace_offset:self.trace_offset + in_view]
+        
+        for slot, (config, copies) in enumerate(shown):
+            index = self.trace_offset + slot
+            x_pos = TRACE_SPACING + slot * (TRACE_WIDTH + TRACE_SPACING)
+            x_mid = x_pos + TRACE_WIDTH // 2
+            
+            # Draw a box for this trace
+            item(("box", slot), "rectangle", (x_pos, 10, x_pos + TRACE_WIDTH, canvas_height - 10),
+                 fill="lightyellow", outline="black")
+            
+            # Draw trace number, and how many identical traces the box stands for
+            label = f"Trace {index + 1}" if copies == 1 else f"Trace {index + 1} (×{copies})"
+            item(("number", slot), "text", (x_mid, 20), text=label, font=("Arial", 8, "bold"))
+            
+            # Draw state
+            item(("state", slot), "text", (x_mid, 40),
+                 text=f"State: {self.simulation.state_name(config)}", font=("Arial", 8))
+            
+            # Draw simplified stack representation
+            stack_text = self.simulation.stack_text(config, 3) + "..." if len(config.stack) > 3 else self.simulation.stack_text(config) or EPSILON
+            item(("stack", slot), "text", (x_mid, 60), text=f"Stack: {stack_text}", font=("Arial", 8))
+            
+            # Draw remaining input (simplified)
+            input_text = config.peek_input(3) + "..." if config.input_left > 3 else config.peek_input(3) or EPSILON
+            item(("input", slot), "text", (x_mid, 80), text=f"Input: {input_text}", font=("Arial", 8))
+            
+            # Draw accept/reject status
+            if not config.input_left:
+                accepted = self.simulation.is_accepting(config)
+                status_text = "ACCEPT" if accepted else "REJECT"
+                status_color = "green" if accepted else "red"
+                
+                item(("status", slot), "text", (x_mid, 100),
+                     text=status_text, font=("Arial", 8, "bold"), fill=status_color)
+        
+        self.hide_items(self.traces_canvas, self.trace_items, drawn)
+        self.traces_scrollbar.set(self.trace_offset / count, (self.trace_offset + len(shown)) / count)
+        first, last = self.trace_offset + 1, self.trace_offset + len(shown)
+        if count != len(self.current_configs):
+            total = f"{count} groups ({len(self.current_configs)} configurations)"
+        else:
+            total = f"{count}"
+        self.traces_count_label.config(text=f"Showing {first}-{last} of {total}")
+
+if __name__ == "__main__":
+    app = StackVisualizer()
+    app.mainloop()
\ No newline at end of file
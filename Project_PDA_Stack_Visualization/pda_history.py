@@ -0,0 +1,222 @@
+"""Per-step frontier history for a simulation, with bounded retention.
+
+A TraceHistory is fed every frontier a Simulation produces and can hand back
+the frontier of an earlier step for rewinding. Its policy decides what stays
+in memory:
+
+    all        keep every step: the last `limit` frontiers as configurations,
+               every step in an in-memory log
+    last       keep the last `limit` frontiers and forget older ones
+    accepting  keep only the current frontier and the paths to accepting
+               configurations
+    spill      like "all", but finished parts of the log go to a file on disk
+
+The log is a series of ConfigurationTable segments of `checkpoint_interval`
+steps each. The first step of a segment stores its stacks in full and every
+later row only the symbols its move pushed, so seeking to a logged step
+rebuilds it from one segment. Every policy but "accepting", "all" included,
+cuts the parent links at the oldest frontier it keeps live, so the
+configurations older than that can be freed and only the compact log
+remembers them.
+"""
+import bisect
+import tempfile
+from array import array
+from collections import deque
+
+from pda_engine import ConfigurationTable
+
+HISTORY_POLICIES = ("all", "last", "accepting", "spill")
+
+
+class LogSegment:
+    """Consecutive steps of a history log, recorded in one ConfigurationTable.
+
+    rows lists the table row of every configuration of every step, step
+    after step, and starts the index in rows where each step begins. Once
+    a spill log writes the segment to its file, table and rows are None and
+    offset is where they were written.
+    """
+
+    def __init__(self, first_step, input_buffer):
+        self.first_step = first_step
+        self.table = ConfigurationTable(input_buffer)
+        self.transition_names = self.table.transition_names
+        self.rows = array('q')
+        self.starts = array('Q')
+        self.offset = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, configs):
+        """Record the next step's frontier"""
+        self.starts.append(len(self.rows))
+        self.rows.extend(self.table.extend(configs))
+
+    def step_rows(self, rows, step):
+        """The part of rows (this segment's, maybe read back from a file) holding step"""
+        index = step - self.first_step
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else len(rows)
+        return rows[self.starts[index]:end]
+
+    def write(self, file):
+        """Append the table and rows to file and drop them from memory"""
+        file.seek(0, 2)
+        self.offset = file.tell()
+        self.table.write(file)
+        file.write(array('q', (len(self.rows),)).tobytes())
+        file.write(self.rows.tobytes())
+        self.table = self.rows = None
+
+    def read(self, file, input_buffer):
+        """Return (table, rows) written to file by write()"""
+        file.seek(self.offset)
+        table = ConfigurationTable.read(file, input_buffer, self.transition_names)
+        length = array('q')
+        length.frombytes(file.read(8))
+        rows = array('q')
+        rows.frombytes(file.read(8 * length[0]))
+        return table, rows
+
+
+class TraceHistory:
+    """Frontier history of one run, retained according to a policy.
+
+    Steps must be recorded in order, one call to record() per step.
+    """
+
+    def __init__(self, policy="all", limit=100, spill_path=None, checkpoint_interval=50):
+        if policy not in HISTORY_POLICIES:
+            raise ValueError(f"Unknown history policy '{policy}'")
+        self.policy = policy
+        self.limit = max(1, limit)
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.input_buffer = None
+        self.first_step = None
+        self.last_step = None
+        self.accepting_configs = []
+        self._accepting_ids = set()
+
+        self._recent = deque()  # (step, configs)
+
+        # Log of every step, for the policies that keep one
+        self._spill_path = spill_path
+        self._spill_file = None
+        self._segments = []
+        self._segment_steps = []  # first_step of each segment, for bisecting
+        self._replayed = None     # (segment, table, rows, known rows, known stacks) of the last seek
+
+    @property
+    def logged(self):
+        """True if every step is logged, not only those in the window"""
+        return self.policy in ("all", "spill")
+
+    def record(self, simulation):
+        """Add the simulation's current frontier as the latest step"""
+        step = simulation.steps
+        configs = list(simulation.configs)
+        if self.input_buffer is None:
+            self.input_buffer = simulation.input_string
+            self.first_step = step
+        sequential = self.last_step is not None and step == self.last_step + 1
+        self.last_step = step
+
+        for config in configs:
+            if id(config) not in self._accepting_ids and simulation.is_accepting(config):
+                self._accepting_ids.add(id(config))
+                self.accepting_configs.append(config)
+
+        if self.policy == "accepting":
+            # Parent links of live and accepting configurations are the paths
+            self._recent.clear()
+            self._recent.append((step, configs))
+            return
+
+        if self.logged:
+            segment = self._segments[-1] if self._segments else None
+            if segment is None or not sequential or step % self.checkpoint_interval == 0:
+                if segment is not None:
+                    self._finish_segment(segment)
+                segment = LogSegment(step, self.input_buffer)
+                self._segments.append(segment)
+                self._segment_steps.append(step)
+            segment.add(configs)
+        self._recent.append((step, configs))
+
+        while len(self._recent) > self.limit:
+            self._recent.popleft()
+            # Let everything older than the window be freed; the log still has it
+            for config in self._recent[0][1]:
+                config.parent = None
+
+    def _finish_segment(self, segment):
+        """Stop adding to a segment, and move it to the spill file if there is one"""
+        segment.table.detach()
+        if self.policy == "spill":
+            if self._spill_file is None:
+                self._spill_file = open(self._spill_path, 'w+b') if self._spill_path else tempfile.TemporaryFile()
+            segment.write(self._spill_file)
+
+    def available(self):
+        """Return the range of steps frontier() can rebuild"""
+        if self.last_step is None:
+            return range(0)
+        if self.policy == "accepting" and self.accepting_configs:
+            return range(self.first_step, self.last_step + 1)
+        if self._segments:
+            return range(self._segments[0].first_step, self.last_step + 1)
+        return range(self._recent[0][0], self.last_step + 1)
+
+    def frontier(self, step):
+        """Return the configurations of an earlier step, or None if they were not kept"""
+        if self._recent:
+            index = step - self._recent[0][0]
+            if 0 <= index < len(self._recent):
+                return self._recent[index][1]
+
+        if self.policy == "accepting":
+            return self._accepting_frontier(step)
+
+        index = bisect.bisect_right(self._segment_steps, step) - 1
+        if index < 0 or step - self._segments[index].first_step >= len(self._segments[index]):
+            return None
+        segment = self._segments[index]
+
+        # Reuse what the last seek rebuilt when it was in the same segment,
+        # as when stepping back through the log
+        if self._replayed is not None and self._replayed[0] is segment:
+            _, table, rows, known, stacks = self._replayed
+        else:
+            if segment.table is not None:
+                table, rows = segment.table, segment.rows
+            else:
+                table, rows = segment.read(self._spill_file, self.input_buffer)
+            known, stacks = {}, {}
+            self._replayed = (segment, table, rows, known, stacks)
+        return table.rebuild(segment.step_rows(rows, step), known, stacks)
+
+    def _accepting_frontier(self, step):
+        """Configurations at a step along the recorded accepting paths"""
+        configs = []
+        for config in self.accepting_configs:
+            path = []
+            while config is not None:
+                path.append(config)
+                config = config.parent
+            path.reverse()
+            index = step - self.first_step
+            if 0 <= index < len(path):
+                configs.append(path[index])
+            elif index >= len(path):
+                configs.append(path[-1])  # Finished early and carried over since
+        return configs or None
+
+    def close(self):
+        """Drop the log; a temporary spill file is deleted"""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._segments = []
+        self._segment_steps = []
+        self._replayed = None
@@ -0,0 +1,217 @@
+"""Opt-in profiling of simulation runs.
+
+ProfiledSimulation is a Simulation that also records where a run spends its
+effort: how often each transition fires, how long each step takes, how the
+frontier and the stacks grow, and how many moves are ε-moves. Simulation
+itself is untouched, so runs that do not ask for a profile pay nothing.
+
+Run from this folder, for example:
+
+    python pda_profile.py pda_wcw.json abcba --json profile.json --csv steps.csv
+
+The exit code reports the run as for the run subcommand: 0 accepted,
+1 rejected, 2 for a machine that cannot be loaded, 3 stopped undecided.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter
+
+from pda_engine import RunResult, Simulation, load_pda_json
+
+# Exit codes, the same as the run subcommand of pda_stack_visualizer
+EXIT_ACCEPTED = 0
+EXIT_REJECTED = 1
+EXIT_ERROR = 2
+EXIT_UNDECIDED = 3
+
+# Columns of the per-step table written by SimulationProfile.write_csv()
+STEP_COLUMNS = ("step", "seconds", "frontier", "moves", "epsilon_moves", "peak_stack")
+
+
+class SimulationProfile:
+    """Counters gathered by a ProfiledSimulation.
+
+    Per step: wall time of step(), frontier size, moves made and how many of
+    them were ε-moves, and the deepest stack. Over the run: hits per
+    transition, keyed by the text shown in traces, and how many frontier
+    entries had each stack depth. Transitions inside folded ε chains count
+    one hit each.
+    """
+
+    def __init__(self):
+        self.transition_hits = Counter()
+        self.depth_counts = Counter()
+        self.step_seconds = []
+        self.frontier_sizes = []
+        self.step_moves = []
+        self.step_epsilon_moves = []
+        self.step_peak_stacks = []
+
+    @property
+    def moves(self):
+        return sum(self.step_moves)
+
+    @property
+    def epsilon_moves(self):
+        return sum(self.step_epsilon_moves)
+
+    @property
+    def epsilon_ratio(self):
+        """Fraction of all moves that read no input"""
+        return self.epsilon_moves / self.moves if self.moves else 0.0
+
+    @property
+    def peak_frontier(self):
+        return max(self.frontier_sizes, default=0)
+
+    @property
+    def peak_stack(self):
+        return max(self.step_peak_stacks, default=0)
+
+    def record_frontier(self, configs):
+        """Count the stack depths of a frontier and note its size"""
+        depths = Counter(len(config.stack) for config in configs)
+        self.depth_counts.update(depths)
+        self.frontier_sizes.append(len(configs))
+        self.step_peak_stacks.append(max(depths, default=0))
+
+    def record_step(self, seconds, configs, previous_ids):
+        """Account for one step that produced configs from the frontier with previous_ids"""
+        moves = epsilon_moves = 0
+        for config in configs:
+            if id(config) in previous_ids:
+                continue  # Halted and carried over, no move made
+            transitions = config.transition_taken.split("; ")
+            self.transition_hits.update(transitions)
+            moves += len(transitions)
+            if config.position == config.parent.position:
+                epsilon_moves += len(transitions)
+            else:
+                epsilon_moves += len(transitions) - 1  # Only the first one read input
+        self.step_seconds.append(seconds)
+        self.step_moves.append(moves)
+        self.step_epsilon_moves.append(epsilon_moves)
+        self.record_frontier(configs)
+
+    def summary(self):
+        """Totals over the run as a dictionary"""
+        return {
+            "steps": len(self.step_seconds),
+            "seconds": sum(self.step_seconds),
+            "moves": self.moves,
+            "epsilon_moves": self.epsilon_moves,
+            "epsilon_ratio": self.epsilon_ratio,
+            "peak_frontier": self.peak_frontier,
+            "peak_stack": self.peak_stack,
+        }
+
+    def to_dict(self):
+        """Everything recorded, in a JSON-friendly layout"""
+        return {
+            "summary": self.summary(),
+            "transition_hits": dict(self.transition_hits.most_common()),
+            "stack_depths": {str(depth): count for depth, count in sorted(self.depth_counts.items())},
+            "steps": [dict(zip(STEP_COLUMNS, row)) for row in self.step_rows()],
+        }
+
+    def step_rows(self):
+        """One row per step, in STEP_COLUMNS order; row 0 is the initial frontier"""
+        rows = [(0, 0.0, self.frontier_sizes[0], 0, 0, self.step_peak_stacks[0])] if self.frontier_sizes else []
+        for i, seconds in enumerate(self.step_seconds):
+            rows.append((i + 1, seconds, self.frontier_sizes[i + 1], self.step_moves[i],
+                         self.step_epsilon_moves[i], self.step_peak_stacks[i + 1]))
+        return rows
+
+    def write_json(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=4, ensure_ascii=False)
+
+    def write_csv(self, file_path):
+        """Write the per-step rows as CSV"""
+        with open(file_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(STEP_COLUMNS)
+            writer.writerows(self.step_rows())
+
+    def write_transitions_csv(self, file_path):
+        """Write the hit count of each transition as CSV, most used first"""
+        with open(file_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(("transition", "hits"))
+            writer.writerows(self.transition_hits.most_common())
+
+
+class ProfiledSimulation(Simulation):
+    """A Simulation that fills in a SimulationProfile as it steps.
+
+    Only the call to Simulation.step() is timed; the bookkeeping after it
+    walks the new frontier once.
+    """
+
+    def __init__(self, pda, input_string):
+        super().__init__(pda, input_string)
+        self.profile = SimulationProfile()
+        self.profile.record_frontier(self.configs)
+
+    def step(self):
+        previous_ids = {id(config) for config in self.configs}
+        start = time.perf_counter()
+        configs = super().step()
+        self.profile.record_step(time.perf_counter() - start, configs, previous_ids)
+        return configs
+
+
+def profile_run(pda, input_string, max_steps=None):
+    """Run input_string to completion, or max_steps, and return its ProfiledSimulation"""
+    simulation = ProfiledSimulation(pda, input_string)
+    while not simulation.accepted and simulation.configs and not simulation.is_finished():
+        if max_steps is not None and simulation.steps >= max_steps:
+            break
+        simulation.step()
+    return simulation
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Profile one simulation run")
+    parser.add_argument("machine", help="PDA JSON file")
+    parser.add_argument("input", help="input string")
+    parser.add_argument("--max-steps", type=int, default=None, help="stop after this many steps")
+    parser.add_argument("--json", help="write the whole profile to this JSON file")
+    parser.add_argument("--csv", help="write per-step rows to this CSV file")
+    parser.add_argument("--transitions-csv", help="write transition hit counts to this CSV file")
+    parser.add_argument("--top", type=int, default=10, help="transitions to list, most used first")
+    args = parser.parse_args(argv)
+
+    try:
+        pda = load_pda_json(args.machine)
+    except (OSError, ValueError) as e:
+        print(f"Error loading {args.machine}: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    simulation = profile_run(pda, args.input, args.max_steps)
+    result = RunResult.from_simulation(
+        simulation, simulation.accepted or not simulation.configs or simulation.is_finished())
+    profile = simulation.profile
+    print(f"{result.status} after {simulation.steps} step(s): {args.input!r}")
+    for name, value in profile.summary().items():
+        print(f"  {name:<14} {value:.6f}" if isinstance(value, float) else f"  {name:<14} {value}")
+    for transition, hits in profile.transition_hits.most_common(args.top):
+        print(f"  {hits:>10}  {transition}")
+
+    if args.json:
+        profile.write_json(args.json)
+    if args.csv:
+        profile.write_csv(args.csv)
+    if args.transitions_csv:
+        profile.write_transitions_csv(args.transitions_csv)
+
+    if result.accepted:
+        return EXIT_ACCEPTED
+    return EXIT_REJECTED if result.finished else EXIT_UNDECIDED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
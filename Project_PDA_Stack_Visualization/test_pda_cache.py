@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from pda_cache import RunCache, input_digest
+from pda_engine import load_pda_json, run
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def wcw():
+    return load_pda_json(os.path.join(HERE, "pda_wcw.json"))
+
+
+def test_answers_are_remembered_by_machine_content():
+    cache = RunCache()
+    assert cache.accepts(wcw(), "abcba")
+    assert not cache.accepts(wcw(), "abcab")
+    assert (cache.hits, cache.misses) == (0, 2)
+    # A fresh load of the same file has the same fingerprint
+    assert cache.accepts(wcw(), "abcba")
+    assert not cache.accepts(wcw(), "abcab")
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert cache.lookup(wcw(), "aca") is None
+
+
+def test_least_recently_used_answers_go_first():
+    cache = RunCache(capacity=2)
+    pda = wcw()
+    cache.accepts(pda, "aca")
+    cache.accepts(pda, "bcb")
+    cache.accepts(pda, "aca")   # Now the most recently used
+    cache.accepts(pda, "abcba")
+    assert len(cache) == 2
+    assert cache.lookup(pda, "bcb") is None
+    assert cache.lookup(pda, "aca") is True
+
+
+def test_prefix_checkpoints_resume_and_agree_with_run():
+    pda = wcw()
+    cache = RunCache(checkpoint_interval=4)
+    prefix = "abbaab"
+    inputs = [prefix + "c" + prefix[::-1], prefix + "c" + prefix, prefix + "ca", prefix + "cbaab"]
+    for input_string in inputs:
+        assert cache.accepts(pda, input_string) == run(pda, input_string).accepted, input_string
+    assert cache.resumed == len(inputs) - 1
+    assert cache.checkpoints
+
+
+def test_answers_persist_through_a_file(tmp_path):
+    path = str(tmp_path / "answers.json")
+    cache = RunCache(path=path)
+    cache.accepts(wcw(), "abcba")
+    cache.accepts(wcw(), "abcab")
+    cache.save()
+
+    loaded = RunCache(path=path)
+    assert len(loaded) == 2
+    assert loaded.accepts(wcw(), "abcba") and not loaded.accepts(wcw(), "abcab")
+    assert loaded.misses == 0
+    # Prefix frontiers stay in memory only
+    assert not loaded.checkpoints
+
+
+def test_unknown_file_version_is_refused(tmp_path):
+    path = tmp_path / "answers.json"
+    path.write_text(json.dumps({"version": 99, "results": []}))
+    with pytest.raises(ValueError):
+        RunCache(path=str(path))
+
+
+def test_str_and_its_utf8_bytes_are_different_inputs():
+    assert input_digest("é") != input_digest("é".encode('utf-8'))
+    pda = load_pda_json(os.path.join(HERE, "pda_even_as.json"))
+    cache = RunCache(checkpoint_interval=2)
+    for input_string in ("éé", "éé".encode('utf-8')):
+        assert cache.accepts(pda, input_string) == run(pda, input_string).accepted
+    assert cache.hits == 0 and cache.resumed == 0
@@ -0,0 +1,171 @@
+import glob
+import itertools
+import os
+import threading
+
+import pytest
+
+from pda_engine import (STREAM_ACCEPTED, STREAM_DEAD, STREAM_VIABLE, Simulation, StreamRecognizer, accepts, decide,
+                        load_pda_json, pda_from_dict, run, shortest_witness, stream_statuses,
+                        transition_path)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def drain_machine():
+    """a^n b, then an epsilon loop pops every A before accepting on Z"""
+    return pda_from_dict({
+        "states": ["q0", "q1", "q2"],
+        "alphabet": ["a", "b"],
+        "stack_symbols": ["Z", "A"],
+        "initial_state": "q0",
+        "initial_stack_symbol": "Z",
+        "accept_states": ["q2"],
+        "transitions": [
+            {"from_state": "q0", "input_symbol": "a", "stack_symbol": "Z", "to_state": "q0", "stack_push": "AZ"},
+            {"from_state": "q0", "input_symbol": "a", "stack_symbol": "A", "to_state": "q0", "stack_push": "AA"},
+            {"from_state": "q0", "input_symbol": "b", "stack_symbol": "A", "to_state": "q1", "stack_push": "A"},
+            {"from_state": "q1", "input_symbol": "ε", "stack_symbol": "A", "to_state": "q1", "stack_push": "ε"},
+            {"from_state": "q1", "input_symbol": "ε", "stack_symbol": "Z", "to_state": "q2", "stack_push": "Z"},
+        ],
+    })
+
+
+def test_pop_only_loop_is_not_an_epsilon_cycle():
+    pda = drain_machine()
+    assert pda.epsilon_cycles == []
+    assert not pda.growing_epsilon_cycle
+
+
+def test_drain_loop_dpda_takes_the_fast_path():
+    pda = drain_machine()
+    assert pda.compile().deterministic
+    for input_string, expected in (("aaab", True), ("ab", True), ("b", False), ("aaba", False), ("aaa", False)):
+        fast = run(pda, input_string)
+        assert fast.accepted == expected
+        assert run(pda, input_string, fast_path=False).accepted == expected
+        assert decide(pda, input_string).accepted == expected
+    # One move per symbol read plus one per A popped and the final move to q2
+    assert run(pda, "aaab").steps == 4 + 3 + 1
+
+
+def test_configuration_repr_shows_compiled_ids():
+    pda = load_pda_json(os.path.join(HERE, "pda_wcw.json"))
+    result = run(pda, "abcba", fast_path=False)
+    config = result.configs[0]
+    assert repr(config.stack) == f"Stack({tuple(config.stack)!r})"
+    assert "stack=Stack(" in repr(config)
+    simulation = Simulation(pda, "abcba")
+    assert simulation.stack_text(simulation.configs[0]) == pda.initial_stack_symbol
+
+
+def all_inputs(alphabet, longest):
+    for length in range(longest + 1):
+        for symbols in itertools.product(sorted(alphabet), repeat=length):
+            yield "".join(symbols)
+
+
+def test_decide_agrees_with_the_search_on_every_bundled_machine():
+    for machine in sorted(glob.glob(os.path.join(HERE, "pda_*.json"))):
+        pda = load_pda_json(machine)
+        alphabet = pda.alphabet - {"ε"}
+        for input_string in all_inputs(alphabet, 6 if len(alphabet) < 3 else 5):
+            expected = run(pda, input_string, fast_path=False).accepted
+            assert decide(pda, input_string).accepted == expected, (machine, input_string)
+            assert accepts(pda, input_string) == expected, (machine, input_string)
+
+
+def growing_machine():
+    """q0 may push A's forever without reading; each a pops one, accept on Z"""
+    return pda_from_dict({
+        "states": ["q0", "q1"],
+        "alphabet": ["a"],
+        "stack_symbols": ["Z", "A"],
+        "initial_state": "q0",
+        "initial_stack_symbol": "Z",
+        "accept_states": ["q1"],
+        "transitions": [
+            {"from_state": "q0", "input_symbol": "ε", "stack_symbol": "Z", "to_state": "q0", "stack_push": "AZ"},
+            {"from_state": "q0", "input_symbol": "ε", "stack_symbol": "A", "to_state": "q0", "stack_push": "AA"},
+            {"from_state": "q0", "input_symbol": "a", "stack_symbol": "A", "to_state": "q0", "stack_push": "ε"},
+            {"from_state": "q0", "input_symbol": "ε", "stack_symbol": "Z", "to_state": "q1", "stack_push": "Z"},
+        ],
+    })
+
+
+def test_decide_handles_a_growing_epsilon_cycle():
+    pda = growing_machine()
+    assert pda.growing_epsilon_cycle
+    for input_string in ("", "a", "aaaa"):
+        assert decide(pda, input_string).accepted
+    assert not decide(pda, "b").accepted
+
+
+def test_stream_reports_viable_accepted_and_dead():
+    pda = load_pda_json(os.path.join(HERE, "pda_wcw.json"))
+    recognizer = StreamRecognizer(pda)
+    assert recognizer.status == STREAM_VIABLE
+    assert recognizer.feed("ab") == STREAM_VIABLE
+    assert recognizer.feed("c") == STREAM_VIABLE
+    assert recognizer.feed("ba") == STREAM_ACCEPTED
+    assert recognizer.position == 5
+    # Anything after a complete wcw can never be accepted
+    assert recognizer.feed("a") == STREAM_DEAD
+
+
+def test_stream_agrees_with_run_for_any_chunking():
+    pda = load_pda_json(os.path.join(HERE, "pda_balanced_parentheses.json"))
+    for input_string in all_inputs({"(", ")"}, 6):
+        expected = run(pda, input_string).accepted
+        for size in (1, 2, 5):
+            chunks = [input_string[i:i + size] for i in range(0, len(input_string), size)]
+            recognizer = StreamRecognizer(pda)
+            for chunk in chunks:
+                recognizer.feed(chunk)
+            assert (recognizer.status == STREAM_ACCEPTED) == expected, (input_string, size)
+        # Bytes are read one symbol per byte
+        assert (StreamRecognizer(pda).feed(input_string.encode()) == STREAM_ACCEPTED) == expected
+
+
+def test_stream_statuses_stop_once_dead():
+    pda = load_pda_json(os.path.join(HERE, "pda_wcw.json"))
+    statuses = list(stream_statuses(pda, ["ab", "cba", "a", "bb"]))
+    assert [status for _, status in statuses] == [STREAM_VIABLE, STREAM_ACCEPTED, STREAM_DEAD]
+
+
+def test_stream_refuses_a_growing_epsilon_cycle():
+    with pytest.raises(ValueError):
+        StreamRecognizer(growing_machine())
+
+
+def test_stream_position_counts_symbols_after_death():
+    pda = load_pda_json(os.path.join(HERE, "pda_wcw.json"))
+    recognizer = StreamRecognizer(pda)
+    assert recognizer.feed("abcbaab") == STREAM_DEAD
+    assert recognizer.position == 7
+    assert recognizer.feed(b"ab") == STREAM_DEAD
+    assert recognizer.position == 9
+
+
+
+def test_fast_path_counts_every_transition_as_a_step():
+    pda = load_pda_json(os.path.join(HERE, "pda_wcw.json"))
+    fast = run(pda, "abcba")
+    slow = run(pda, "abcba", fast_path=False)
+    assert fast.accepted and slow.accepted
+    # Simulation folds the chain of epsilon rewrites at the end into one step
+    assert (fast.steps, slow.steps) == (7, 6)
+    assert fast.explored == fast.steps + 1
+    assert len(transition_path(slow.accepting_config)) == 6
+
+
+def test_shortest_witness_stops_at_its_limit_or_when_cancelled():
+    pda = growing_machine()
+    assert shortest_witness(pda, "aaa").accepted
+    # "b" is never accepted, and the growing cycle gives a large space to search
+    limited = shortest_witness(pda, "aab", max_configs=10)
+    assert (limited.status, limited.explored) == ("undecided", 10)
+    cancel = threading.Event()
+    cancel.set()
+    cancelled = shortest_witness(pda, "aaa", cancel=cancel)
+    assert cancelled.status == "undecided" and cancelled.explored == 0
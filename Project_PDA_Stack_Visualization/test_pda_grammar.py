@@ -0,0 +1,50 @@
+import itertools
+import os
+
+from pda_engine import decide, run
+from pda_grammar import grammar_to_pda, load_grammar, parse_grammar, simplify
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+GRAMMARS = {
+    "expressions": (load_grammar(os.path.join(HERE, "grammar_expressions.cfg")), "a+*()"),
+    "indirect": (parse_grammar("S -> S a | b B\nB -> B S | c"), "abc"),
+    "balanced": (parse_grammar("S -> ( S ) S | ε"), "()"),
+    "units": (parse_grammar("S -> A | a S b\nA -> B | c\nB -> S | ε"), "abc"),
+}
+
+
+def all_inputs(alphabet, longest):
+    for length in range(longest + 1):
+        for symbols in itertools.product(alphabet, repeat=length):
+            yield "".join(symbols)
+
+
+def test_simplify_leaves_no_unit_rules_epsilon_rules_or_left_recursion():
+    for name, (grammar, _) in GRAMMARS.items():
+        simple = simplify(grammar)
+        for head, bodies in simple.rules.items():
+            for body in bodies:
+                assert not (len(body) == 1 and body[0] in simple.rules), (name, head, body)
+                assert body or head == simple.start, (name, head)
+                assert not body or body[0] != head, (name, head, body)
+        assert not grammar_to_pda(grammar).growing_epsilon_cycle, name
+
+
+def test_simplified_machine_accepts_the_same_language():
+    for name, (grammar, alphabet) in GRAMMARS.items():
+        raw = grammar_to_pda(grammar, clean=False)
+        clean = grammar_to_pda(grammar)
+        for input_string in all_inputs(alphabet, 5):
+            expected = decide(raw, input_string).accepted
+            assert decide(clean, input_string).accepted == expected, (name, input_string)
+            # Without ε-cycles the plain search finishes on the simplified machine too
+            assert run(clean, input_string, fast_path=False).accepted == expected, (name, input_string)
+
+
+def test_expression_machine_membership():
+    pda = grammar_to_pda(GRAMMARS["expressions"][0])
+    for input_string in ("a", "a+a", "(a+a)*a", "((a))"):
+        assert run(pda, input_string).accepted, input_string
+    for input_string in ("", "a+", "(a", "a**a", ")("):
+        assert not run(pda, input_string).accepted, input_string
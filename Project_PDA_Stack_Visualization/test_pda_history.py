@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from pda_engine import Simulation, load_pda_json
+from pda_history import TraceHistory
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def record_run(machine, input_string, history):
+    """Run to the end, recording every step; return what each frontier looked like"""
+    simulation = Simulation(load_pda_json(os.path.join(HERE, machine)), input_string)
+    history.record(simulation)
+    frontiers = [[simulation.describe(config) for config in simulation.configs]]
+    while simulation.configs and not simulation.is_finished():
+        simulation.step()
+        history.record(simulation)
+        frontiers.append([simulation.describe(config) for config in simulation.configs])
+    return simulation, frontiers
+
+
+@pytest.mark.parametrize("policy", ["all", "spill"])
+@pytest.mark.parametrize("limit", [1, 3])
+def test_logged_policies_rebuild_every_step(policy, limit, tmp_path):
+    spill_path = str(tmp_path / "history.log") if policy == "spill" else None
+    history = TraceHistory(policy, limit, spill_path=spill_path, checkpoint_interval=4)
+    simulation, frontiers = record_run("pda_anbmc.json", "aaabbbccc", history)
+
+    assert history.available() == range(0, len(frontiers))
+    # Backwards, then forwards, to reuse and then skip the rebuilt segments
+    steps = list(reversed(history.available())) + list(history.available())
+    for step in steps:
+        configs = history.frontier(step)
+        assert [simulation.describe(config) for config in configs] == frontiers[step]
+        for config in configs:
+            if config.parent is not None and config.transition_taken is not None:
+                assert simulation.describe(config.parent) in frontiers[step - 1]
+    if policy == "spill":
+        assert os.path.getsize(spill_path) > 0
+    history.close()
+
+
+def test_last_keeps_only_the_window():
+    history = TraceHistory("last", 3)
+    simulation, frontiers = record_run("pda_wcw.json", "abbcbba", history)
+
+    last = len(frontiers) - 1
+    assert history.available() == range(last - 2, last + 1)
+    assert history.frontier(last - 3) is None
+    for step in history.available():
+        assert [simulation.describe(config) for config in history.frontier(step)] == frontiers[step]
+    # Parent links are cut at the oldest kept step
+    assert all(config.parent is None for config in history.frontier(last - 2))
+
+
+def test_accepting_keeps_the_accepting_path():
+    history = TraceHistory("accepting", 1)
+    simulation, frontiers = record_run("pda_balanced_parentheses.json", "(())", history)
+
+    assert simulation.accepted
+    assert len(history.accepting_configs) == 1
+    for step in history.available():
+        configs = history.frontier(step)
+        assert len(configs) == 1
+        assert simulation.describe(configs[0]) in frontiers[step]
+    assert simulation.is_accepting(history.frontier(history.last_step)[0])
+
+
+def test_unknown_policy_is_refused():
+    with pytest.raises(ValueError):
+        TraceHistory("forever")
@@ -0,0 +1,37 @@
+import os
+
+from pda_stack_visualizer import EXIT_ERROR, main
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WCW = os.path.join(HERE, "pda_wcw.json")
+MISSING = os.path.join(HERE, "no_such_file.txt")
+
+
+def test_stream_reports_a_missing_input_file():
+    assert main(["stream", WCW, MISSING]) == EXIT_ERROR
+
+
+def test_cache_reports_a_missing_machine_file(tmp_path):
+    inputs = tmp_path / "inputs.txt"
+    inputs.write_text("abcba\n")
+    assert main(["cache", MISSING, str(inputs)]) == EXIT_ERROR
+
+
+def test_batch_exit_codes(tmp_path):
+    accepted = tmp_path / "accepted.txt"
+    accepted.write_text("abcba\naca\n")
+    mixed = tmp_path / "mixed.txt"
+    mixed.write_text("abcba\nabcab\n")
+    assert main(["batch", WCW, str(accepted), "--workers", "1"]) == 0
+    assert main(["batch", WCW, str(mixed), "--workers", "1"]) == 1
+    assert main(["batch", WCW, str(mixed), "--workers", "1", "--max-steps", "1"]) == 3
+    assert main(["batch", MISSING, str(mixed), "--workers", "1"]) == EXIT_ERROR
+
+
+def test_profile_exit_codes(tmp_path):
+    steps_csv = str(tmp_path / "steps.csv")
+    assert main(["profile", WCW, "abcba", "--csv", steps_csv]) == 0
+    assert os.path.getsize(steps_csv) > 0
+    assert main(["profile", WCW, "abcab"]) == 1
+    assert main(["profile", WCW, "abcba", "--max-steps", "1"]) == 3
+    assert main(["profile", MISSING, "abcba"]) == EXIT_ERROR